@@ -0,0 +1,230 @@
+"""
+Asset Loader Module for FitPro
+Decodes images on a worker thread while the splash screen is up, downsampled
+to the size they are drawn at, and keeps the resulting textures. Decoded
+pixels are also cached on disk, so later launches skip the JPEG decode.
+Other slow start-up work (prewarming the GIF frame cache) can run on the
+same worker.
+"""
+
+import os
+import struct
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from kivy.clock import Clock
+from kivy.graphics.texture import Texture
+
+from clock_profiler import profiled
+from keyed_file_cache import KeyedFileCache
+
+
+# Cache file layout (little endian): header, then top-down pixel rows
+_MAGIC = b'FPAI'
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct('<4sHHII')  # magic, version, channels, width, height
+_FILE_EXT = '.pixels'
+_COLORFMT = {3: 'rgb', 4: 'rgba'}
+
+
+def cover_size(image_size: Tuple[int, int], target: Tuple[int, int]) -> Tuple[int, int]:
+    """Smallest size with the image's aspect ratio that still covers `target` (never upscaled)"""
+    width, height = image_size
+    scale = min(1.0, max(target[0] / float(width), target[1] / float(height)))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def decode_image(path: str, target: Optional[Tuple[int, int]] = None) -> Tuple[Tuple[int, int], int, bytes]:
+    """
+    Decode an image file into top-down RGB(A) bytes
+
+    Args:
+        path: Image file
+        target: Size the image is drawn at, in pixels; the image is
+            downsampled to cover it. JPEGs are decoded at a reduced DCT
+            scale already, which skips most of the decoding work.
+
+    Returns:
+        tuple: ((width, height), channels, pixel bytes)
+    """
+    from PIL import Image as PILImage
+    with PILImage.open(path) as image:
+        if target:
+            # no-op for formats other than JPEG
+            image.draft('RGB', cover_size(image.size, target))
+        mode = 'RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB'
+        image = image.convert(mode)
+    if target:
+        size = cover_size(image.size, target)
+        if size != image.size:
+            image = image.resize(size, PILImage.BILINEAR, reducing_gap=2.0)
+    return image.size, len(mode), image.tobytes()
+
+
+def pixels_texture(size: Tuple[int, int], channels: int, data) -> Texture:
+    """Upload top-down RGB(A) bytes (as produced by PIL) into a new texture (UI thread only)"""
+    colorfmt = _COLORFMT[channels]
+    texture = Texture.create(size=size, colorfmt=colorfmt)
+    texture.blit_buffer(data, colorfmt=colorfmt, bufferfmt='ubyte')
+    texture.flip_vertical()
+    return texture
+
+
+class DecodedImageCache(KeyedFileCache):
+    """On-disk cache of downsampled images, keyed by source file and target size"""
+    def __init__(self, cache_dir: str):
+        super().__init__(cache_dir, _FILE_EXT, _FORMAT_VERSION)
+
+    def cache_path(self, source: str, target: Optional[Tuple[int, int]]) -> str:
+        """Cache file for `source`; the name changes with the file's mtime/size and the target"""
+        return self.entry_path(source, target)
+
+    def load(self, source: str, target: Optional[Tuple[int, int]]):
+        """Decoded image as returned by decode_image(), or None on a miss"""
+        try:
+            with open(self.cache_path(source, target), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) < _HEADER.size:
+            return None
+        magic, version, channels, width, height = _HEADER.unpack_from(data, 0)
+        if (magic != _MAGIC or version != _FORMAT_VERSION or channels not in _COLORFMT
+                or len(data) != _HEADER.size + width * height * channels):
+            print(f'[WARN] Ignoring decoded image cache for {source}')
+            return None
+        return (width, height), channels, data[_HEADER.size:]
+
+    def store(self, source: str, target: Optional[Tuple[int, int]], decoded):
+        """
+        Write a decoded image, replacing older entries for the same file;
+        failures only cost the next launch a decode
+        """
+        (width, height), channels, pixels = decoded
+        try:
+            path = self.prepare_entry(source, target)
+            tmp_path = self.temp_path(path)
+            with open(tmp_path, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, channels, width, height))
+                f.write(pixels)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f'[WARN] Could not write decoded image cache: {e}')
+
+
+class AssetLoader:
+    """
+    Runs asset jobs on background threads and hands their results to the UI
+    thread. Images become textures, available from texture(key); when_ready()
+    calls back once a set of jobs has finished, successfully or not.
+    """
+    def __init__(self, cache_dir: Optional[str] = None, workers: int = 2):
+        """
+        Args:
+            cache_dir: Directory for decoded images (None disables the disk cache)
+            workers: Worker threads; decoding releases the GIL, so two jobs
+                really run side by side
+        """
+        self._cache = DecodedImageCache(cache_dir) if cache_dir else None
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='assets')
+        self._textures: Dict[str, Texture] = {}
+        self._results: Dict[str, object] = {}
+        self._pending: Dict[str, float] = {}  # key -> time the job was queued
+        self._futures: Dict[str, Future] = {}
+        self._waiters: List[Tuple[frozenset, Callable[[], None]]] = []
+
+    def load_image(self, key: str, path: str, target: Optional[Tuple[int, int]] = None):
+        """
+        Decode an image in the background and upload it as texture `key`
+
+        Args:
+            key: Name the texture is looked up by
+            path: Image file
+            target: Size the image is drawn at, in pixels (None keeps full size)
+        """
+        if key in self._textures or key in self._pending:
+            return
+        target = (int(target[0]), int(target[1])) if target else None
+
+        def job():
+            decoded = self._cache.load(path, target) if self._cache else None
+            if decoded is None:
+                decoded = decode_image(path, target)
+                if self._cache:
+                    self._cache.store(path, target, decoded)
+            return decoded
+
+        self._submit(key, job, lambda decoded: self._upload(key, path, decoded))
+
+    def run(self, key: str, fn: Callable[[], object]):
+        """Run fn() in the background; its result is available from result(key)"""
+        if key in self._results or key in self._pending:
+            return
+        self._submit(key, fn, lambda value: self._results.__setitem__(key, value))
+
+    def texture(self, key: str) -> Optional[Texture]:
+        """Texture of a finished image job (None while loading or after a failure)"""
+        return self._textures.get(key)
+
+    def result(self, key: str):
+        return self._results.get(key)
+
+    def is_done(self, key: str) -> bool:
+        return key not in self._pending
+
+    def when_ready(self, keys: Iterable[str], callback: Callable[[], None]):
+        """Call callback() on the UI thread once all `keys` are done (now if they are)"""
+        waiting = frozenset(key for key in keys if key in self._pending)
+        if not waiting:
+            Clock.schedule_once(lambda dt: callback())
+        else:
+            self._waiters.append((waiting, callback))
+
+    def shutdown(self):
+        """Drop the jobs that have not started; running ones finish in the background"""
+        # by hand: shutdown(cancel_futures=True) needs Python 3.9
+        for future in list(self._futures.values()):
+            future.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _submit(self, key: str, job: Callable[[], object], on_result: Callable[[object], None]):
+        self._pending[key] = time.perf_counter()
+
+        def run_job():
+            try:
+                value, error = job(), None
+            except Exception as e:
+                value, error = None, e
+            Clock.schedule_once(lambda dt: self._finish(key, value, error, on_result))
+
+        self._futures[key] = self._executor.submit(run_job)
+
+    @profiled
+    def _finish(self, key: str, value, error: Optional[Exception],
+                on_result: Callable[[object], None]):
+        """Store a job's result (UI thread) and wake the callers waiting for it"""
+        if error is not None:
+            print(f'[WARN] Loading asset {key} failed: {error}')
+        try:
+            on_result(value)
+        except Exception as e:
+            print(f'[WARN] Loading asset {key} failed: {e}')
+        self._futures.pop(key, None)
+        queued = self._pending.pop(key, None)
+        if queued is not None:
+            print(f'[INFO] Asset {key} ready after {(time.perf_counter() - queued) * 1000:.0f} ms')
+        ready = [callback for waiting, callback in self._waiters
+                 if waiting.isdisjoint(self._pending)]
+        self._waiters = [(waiting, callback) for waiting, callback in self._waiters
+                         if not waiting.isdisjoint(self._pending)]
+        for callback in ready:
+            callback()
+
+    def _upload(self, key: str, path: str, decoded):
+        if decoded is None:
+            # decoding failed off-thread; let Kivy's own loader have a go
+            from kivy.core.image import Image as CoreImage
+            self._textures[key] = CoreImage(path).texture
+            return
+        self._textures[key] = pixels_texture(*decoded)
@@ -0,0 +1,182 @@
+"""
+Chat transcript benchmark
+Fills the chat transcript with up to 5,000 messages and, at checkpoints,
+measures frame time while scrolling, resident memory and the number of
+widgets. Compares the recycled ChatTranscript with the previous layout
+(one markup Label per message in a GridLayout) when --legacy is given.
+
+    python benchmarks/bench_chat_transcript.py --messages 5000 --legacy
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_LOG_MODE', 'PYTHON')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kivy.config import Config  # noqa: E402
+# no frame rate cap: frame times should show work, not the Clock's sleep
+Config.set('graphics', 'maxfps', '0')
+
+from kivy.base import EventLoop  # noqa: E402
+from kivy.clock import Clock  # noqa: E402
+from kivy.lang import Builder  # noqa: E402
+from kivy.metrics import dp  # noqa: E402
+from kivy.uix.gridlayout import GridLayout  # noqa: E402
+from kivy.uix.label import Label  # noqa: E402
+from kivy.uix.scrollview import ScrollView  # noqa: E402
+
+from chat_screen import ChatTranscript  # noqa: E402
+
+SAMPLE_REPLIES = (
+    "Walking is one of the best low-impact exercises. Try a brisk 30-minute walk most days.",
+    "Aim for about 2-3 liters of water a day, more when it's hot or you're sweating a lot.",
+    "Train each major muscle group twice a week, with compound lifts like squats and rows. "
+    "Prioritize form over weight, and rest at least a day between heavy sessions.",
+)
+
+
+def rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def render_frame(window):
+    """One frame of the event loop without input handling"""
+    Clock.tick()
+    Builder.sync()
+    Clock.tick_draw()
+    Builder.sync()
+    window.dispatch('on_draw')
+    window.dispatch('on_flip')
+
+
+def scroll_by(view, content_height: float, pixels: float):
+    """Scroll a ScrollView up by `pixels`, wrapping around at the top"""
+    scrollable = max(1.0, content_height - view.height)
+    position = view.scroll_y + pixels / scrollable
+    view.scroll_y = position if position <= 1.0 else 0.0
+
+
+def message_text(i: int) -> str:
+    if i % 2 == 0:
+        return f'How should I train this week? ({i})'
+    return f'[b]Assistant:[/b]\n{SAMPLE_REPLIES[i % len(SAMPLE_REPLIES)]}'
+
+
+class RecycledTranscript:
+    name = 'recycleview'
+
+    def __init__(self, window):
+        self.view = ChatTranscript(size=(dp(360), dp(560)), size_hint=(None, None))
+        window.add_widget(self.view)
+
+    def add(self, text: str):
+        self.view.append(text)
+
+    def scroll(self, pixels: float):
+        scroll_by(self.view, self.view.layout_manager.height, pixels)
+
+    def widget_count(self) -> int:
+        return len(self.view.layout_manager.children)
+
+
+class LegacyTranscript:
+    """The transcript as it was: a Label per message in a GridLayout"""
+    name = 'legacy'
+
+    def __init__(self, window):
+        self.view = ScrollView(size=(dp(360), dp(560)), size_hint=(None, None))
+        self.layout = GridLayout(cols=1, spacing=dp(8), size_hint_y=None, padding=dp(5))
+        self.layout.bind(minimum_height=self.layout.setter('height'))
+        self.view.add_widget(self.layout)
+        window.add_widget(self.view)
+
+    def add(self, text: str):
+        label = Label(text=text, size_hint_y=None, markup=True,
+                      text_size=(self.layout.width - dp(30), None))
+        label.bind(texture_size=lambda *args: setattr(label, 'height', label.texture_size[1] + dp(10)))
+        self.layout.add_widget(label)
+
+    def scroll(self, pixels: float):
+        scroll_by(self.view, self.layout.height, pixels)
+
+    def widget_count(self) -> int:
+        return len(self.layout.children)
+
+
+def measure(transcript, window, frames: int, speed: float = dp(40)):
+    """Frame times in ms while flinging upwards by `speed` pixels per frame"""
+    times = []
+    for _ in range(frames):
+        transcript.scroll(speed)
+        start = time.perf_counter()
+        render_frame(window)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def run(messages: int = 5000, checkpoints=(100, 1000, 2500, 5000), frames: int = 60,
+        legacy: bool = False):
+    """
+    Run the benchmark
+
+    Returns:
+        dict: {implementation: [{messages, frame_ms_mean, frame_ms_p95, rss_mb, widgets}, ...]}
+    """
+    EventLoop.ensure_window()
+    window = EventLoop.window
+    results = {}
+    for cls in ([RecycledTranscript, LegacyTranscript] if legacy else [RecycledTranscript]):
+        transcript = cls(window)
+        render_frame(window)
+        rows = []
+        added = 0
+        for checkpoint in sorted(c for c in checkpoints if c <= messages):
+            while added < checkpoint:
+                transcript.add(message_text(added))
+                added += 1
+                if added % 50 == 0:
+                    render_frame(window)
+            render_frame(window)
+            times = measure(transcript, window, frames)
+            rows.append({
+                'messages': checkpoint,
+                'frame_ms_mean': round(statistics.mean(times), 3),
+                'frame_ms_p95': round(sorted(times)[int(len(times) * 0.95) - 1], 3),
+                'rss_mb': round(rss_mb(), 1),
+                'widgets': transcript.widget_count(),
+            })
+            print(f'[INFO] {cls.name:12} {checkpoint:5d} msgs: '
+                  f'frame {rows[-1]["frame_ms_mean"]:.2f} ms (p95 {rows[-1]["frame_ms_p95"]:.2f}), '
+                  f'rss {rows[-1]["rss_mb"]:.0f} MB, {rows[-1]["widgets"]} widgets')
+        window.remove_widget(transcript.view)
+        results[cls.name] = rows
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--frames', type=int, default=60, help='frames measured per checkpoint')
+    parser.add_argument('--legacy', action='store_true', help='also run the Label-per-message layout')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+    results = run(args.messages, frames=args.frames, legacy=args.legacy)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
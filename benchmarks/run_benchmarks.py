@@ -0,0 +1,340 @@
+"""
+FitPro benchmark suite
+Runs headless and offline, with fixed seeds and sizes, and writes the
+results as JSON to benchmarks/results/. When a baseline exists, every
+timing (metrics ending in _us or _ms) is compared with it and slowdowns
+beyond the threshold are flagged; the exit status is 1 if any were found.
+
+    python benchmarks/run_benchmarks.py                  # run and compare
+    python benchmarks/run_benchmarks.py --save-baseline  # make this run the baseline
+    python benchmarks/run_benchmarks.py --only calc,chatbot_fallback
+
+Benchmarks:
+    calc               fitness_calc scalar, per-profile and batch throughput
+    gif_decode         AnimatedGif._load_gif per frame, cold (decode) and warm (frame cache)
+    chatbot_fallback   FitProChatbot._get_fallback_response latency
+    chat_transcript    chat transcript scrolling (see bench_chat_transcript.py)
+    update_ui          FitProInterface._update_ui per call
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+# sets up the headless Kivy environment and the import path
+import bench_chat_transcript
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, 'baseline.json')
+SEED = 1234
+
+FALLBACK_QUESTIONS = (
+    'hi there',
+    'How many calories does walking burn?',
+    'what should I eat before a workout',
+    'Can you suggest a beginner strength routine?',
+    'how much water should I drink each day',
+    'I feel sore after leg day, what helps with recovery?',
+    'tips to stay motivated',
+    'Is it ok to run every day?',
+    'What is the weather like tomorrow?',
+    'how do I lose belly fat',
+)
+
+
+def best_time(fn, repeat: int) -> float:
+    """Fastest of `repeat` runs of fn(), in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_calc(args):
+    """Distance/calorie throughput per sample for each API"""
+    import fitness_calc
+    from fitness_calc import (MetricProfile, calculate_calories_burned,
+                              calculate_distance_and_calories_batch, calculate_stride_length)
+
+    rng = random.Random(SEED)
+    n = args.samples
+    genders = ('male', 'female', 'other')
+    steps = [rng.randint(0, 2000) for _ in range(n)]
+    heights = [rng.uniform(150, 200) for _ in range(n)]
+    weights = [rng.uniform(45, 110) for _ in range(n)]
+    codes = [rng.randrange(3) for _ in range(n)]
+    names = [genders[c] for c in codes]
+
+    def scalar():
+        for i in range(n):
+            stride = calculate_stride_length(heights[i], names[i])
+            calculate_calories_burned(steps[i], weights[i], stride)
+
+    profile = MetricProfile(175, 70, 'male')
+
+    def per_profile():
+        for s in steps:
+            profile.distance_km(s)
+            profile.calories(s)
+
+    def batch():
+        calculate_distance_and_calories_batch(steps, heights, weights, codes)
+
+    per_sample = 1e6 / n
+    result = OrderedDict(samples=n)
+    result['scalar_us'] = best_time(scalar, args.repeat) * per_sample
+    result['profile_us'] = best_time(per_profile, args.repeat) * per_sample
+    if fitness_calc._numpy() is not None:
+        result['batch_numpy_us'] = best_time(batch, args.repeat) * per_sample
+    # the pure Python path is what runs on devices without NumPy
+    saved, fitness_calc._np = fitness_calc._np, None
+    try:
+        result['batch_python_us'] = best_time(batch, args.repeat) * per_sample
+    finally:
+        fitness_calc._np = saved
+    return result
+
+
+def bench_gif_decode(args):
+    """AnimatedGif._load_gif time per frame, decoding vs. reading the frame cache"""
+    from fitpro import AnimatedGif
+    from gif_cache import GifFrameCache
+
+    class BenchGif(AnimatedGif):
+        def __init__(self, cache_dir, **kwargs):
+            self._cache_dir = cache_dir
+            super().__init__(**kwargs)
+
+        def _frame_cache(self):
+            return GifFrameCache(self._cache_dir)
+
+        def _load_gif(self):
+            # the load the widget schedules for itself; timed explicitly below
+            pass
+
+    source = os.path.join(ROOT, args.gif)
+    cache_dir = tempfile.mkdtemp(prefix='fitpro-bench-gif-')
+    result = OrderedDict(source=args.gif)
+    try:
+        for phase in ('cold', 'warm'):
+            # fixed pixel size, so the frame size does not depend on the display density
+            gif = BenchGif(cache_dir, source=source, size_hint=(None, None), size=(80, 80))
+            start = time.perf_counter()
+            AnimatedGif._load_gif(gif)
+            elapsed = time.perf_counter() - start
+            if not gif.frame_count:
+                raise RuntimeError(f'no frames loaded from {args.gif}')
+            result['frames'] = gif.frame_count
+            result[f'{phase}_frame_ms'] = elapsed * 1000 / gif.frame_count
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return result
+
+
+def bench_chatbot_fallback(args):
+    """Offline answer latency: first call (builds the keyword matcher) and steady state"""
+    from chat_backends import HttpBackend
+    from chatbot import FitProChatbot
+
+    random.seed(SEED)
+    # a backend on an unused local port keeps the connectivity probe off the network
+    bot = FitProChatbot(backend=HttpBackend('http://127.0.0.1:9'))
+    FitProChatbot._matcher = None
+    start = time.perf_counter()
+    bot._get_fallback_response(FALLBACK_QUESTIONS[0])
+    first = time.perf_counter() - start
+
+    def answer_all():
+        for _ in range(args.rounds):
+            for question in FALLBACK_QUESTIONS:
+                bot._get_fallback_response(question)
+
+    calls = args.rounds * len(FALLBACK_QUESTIONS)
+    return OrderedDict([
+        ('first_call_ms', first * 1000),
+        ('response_us', best_time(answer_all, args.repeat) * 1e6 / calls),
+    ])
+
+
+def bench_transcript(args):
+    """Scrolling frame time with a long transcript"""
+    rows = bench_chat_transcript.run(args.messages, checkpoints=(args.messages,),
+                                     frames=args.frames)['recycleview']
+    row = rows[-1]
+    return OrderedDict([
+        ('messages', row['messages']),
+        ('frame_mean_ms', row['frame_ms_mean']),
+        ('frame_p95_ms', row['frame_ms_p95']),
+        ('widgets', row['widgets']),
+    ])
+
+
+def bench_update_ui(args):
+    """
+    FitProInterface._update_ui per call with a changed step count, alone and
+    together with re-rendering the labels it touched
+    """
+    from kivy.base import EventLoop
+    from kivy.lang import Builder
+    from fitpro import AnimatedGif, FitProInterface
+
+    EventLoop.ensure_window()
+    Builder.load_file(os.path.join(ROOT, 'fitproapp.kv'))
+    interface = FitProInterface()
+    # the GIFs are not part of this benchmark; keep their scheduled loads from decoding
+    for widget in interface.walk(restrict=True):
+        if isinstance(widget, AnimatedGif):
+            widget.source = ''
+    labels = [interface.ids[name] for name in ('steps_label', 'calories_value', 'distance_value')
+              if name in interface.ids]
+    calls = args.calls
+    counter = [int(interface.steps)]
+
+    def update(render):
+        for _ in range(calls):
+            counter[0] += 1
+            interface.steps = counter[0]
+            interface._update_ui()
+            if render:
+                for label in labels:
+                    label.texture_update()
+
+    result = OrderedDict(calls=calls)
+    result['update_us'] = best_time(lambda: update(False), args.repeat) * 1e6 / calls
+    result['update_render_us'] = best_time(lambda: update(True), args.repeat) * 1e6 / calls
+    return result
+
+
+# run in this order; update_ui last, since it leaves a dashboard behind
+BENCHMARKS = OrderedDict([
+    ('calc', bench_calc),
+    ('gif_decode', bench_gif_decode),
+    ('chatbot_fallback', bench_chatbot_fallback),
+    ('chat_transcript', bench_transcript),
+    ('update_ui', bench_update_ui),
+])
+
+
+def is_timing(metric: str) -> bool:
+    """Metrics compared against the baseline: times, where lower is better"""
+    return metric.endswith('_us') or metric.endswith('_ms')
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def environment() -> dict:
+    import kivy
+    return OrderedDict([
+        ('time', time.strftime('%Y-%m-%dT%H:%M:%S')),
+        ('revision', git_revision()),
+        ('python', platform.python_version()),
+        ('kivy', kivy.__version__),
+        ('platform', platform.platform()),
+        ('machine', platform.machine()),
+    ])
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """
+    Compare timings with a baseline run
+
+    Returns:
+        list: (benchmark, metric, baseline value, value, ratio) of every
+        timing slower than the baseline by more than `threshold`
+    """
+    regressions = []
+    for name, metrics in results['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous:
+            continue
+        for metric, value in metrics.items():
+            old = previous.get(metric)
+            if not is_timing(metric) or not old:
+                continue
+            ratio = value / old
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  REGRESSION'
+                regressions.append((name, metric, old, value, ratio))
+            elif ratio < 1 - threshold:
+                flag = '  faster'
+            print(f'[INFO] {name + "." + metric:40} {old:12.3f} -> {value:12.3f} ({ratio:5.2f}x){flag}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--only', help='comma separated benchmarks to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per timing; the fastest counts')
+    parser.add_argument('--samples', type=int, default=100000, help='samples for calc')
+    parser.add_argument('--gif', default='calories.gif', help='GIF for gif_decode')
+    parser.add_argument('--rounds', type=int, default=200, help='rounds over the questions for chatbot_fallback')
+    parser.add_argument('--messages', type=int, default=1000, help='messages for chat_transcript')
+    parser.add_argument('--frames', type=int, default=120, help='frames measured for chat_transcript')
+    parser.add_argument('--calls', type=int, default=500, help='calls per timing for update_ui')
+    parser.add_argument('--output', help='result file (default: benchmarks/results/<time>.json)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='results to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='also store this run as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='flag timings slower than the baseline by more than this fraction')
+    args = parser.parse_args()
+
+    names = list(BENCHMARKS)
+    if args.only:
+        names = [name.strip() for name in args.only.split(',') if name.strip()]
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            parser.error(f'unknown benchmarks: {", ".join(unknown)} (choose from {", ".join(BENCHMARKS)})')
+        names = [name for name in BENCHMARKS if name in names]
+
+    results = OrderedDict(environment=environment(), benchmarks=OrderedDict())
+    for name in names:
+        start = time.perf_counter()
+        metrics = BENCHMARKS[name](args)
+        results['benchmarks'][name] = metrics
+        summary = ', '.join(f'{k}={v:.3f}' if isinstance(v, float) else f'{k}={v}'
+                            for k, v in metrics.items())
+        print(f'[INFO] {name} ({time.perf_counter() - start:.1f} s): {summary}')
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime('%Y%m%d-%H%M%S') + '.json')
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'[INFO] Results written to {output}')
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f'[INFO] Comparing with {args.baseline} '
+              f'(revision {baseline.get("environment", {}).get("revision") or "unknown"})')
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'[WARN] {len(regressions)} timing(s) regressed by more than {args.threshold:.0%}')
+        else:
+            print('[INFO] No regressions')
+    if args.save_baseline:
+        shutil.copyfile(output, args.baseline)
+        print(f'[INFO] Baseline saved to {args.baseline}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,11 +4,11 @@ package.name = fitpro
 package.domain = org.fitpro
 
 source.dir = .
-source.include_exts = py,png,jpg,kv,ttf
+source.include_exts = py,png,jpg,kv,ttf,json
 
 version = 1.0
 
-requirements = kivy==2.1.0,plyer,pillow
+requirements = kivy==2.1.0,plyer,pillow,sqlite3
 
 orientation = portrait
 
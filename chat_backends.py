@@ -0,0 +1,147 @@
+"""
+Chat Backends Module for FitPro
+Interface between FitProChatbot and the service that writes the replies:
+Google Gemini in the app, or any HTTP endpoint speaking the small JSON
+protocol of mock_chat_server.py for offline benchmarks and load tests.
+"""
+
+import asyncio
+import json
+import socket
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Request payload: [{"role": "user" | "model", "parts": [text]}, ...]
+Contents = List[Dict]
+
+
+class BackendError(Exception):
+    """A backend request failed; `retryable` tells whether trying again may help"""
+    def __init__(self, message: str, status: Optional[int] = None, retryable: bool = False):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+
+
+class ChatBackend:
+    """
+    Base class for chat backends. Subclasses implement generate(); the
+    default stream() yields the whole reply as one chunk and agenerate()
+    runs generate() in the event loop's default executor.
+    """
+    name = 'base'
+
+    def probe_address(self) -> Optional[Tuple[str, int]]:
+        """(host, port) to probe for connectivity, or None for the default internet probe"""
+        return None
+
+    def generate(self, contents: Contents, timeout: Optional[float] = None) -> str:
+        """Full reply text for the conversation `contents`, within `timeout` seconds"""
+        raise NotImplementedError
+
+    def stream(self, contents: Contents, timeout: Optional[float] = None) -> Iterator[str]:
+        """Reply text in pieces as they are produced"""
+        yield self.generate(contents, timeout)
+
+    async def agenerate(self, contents: Contents, timeout: Optional[float] = None) -> str:
+        """generate() for asyncio callers"""
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.generate, contents, timeout)
+
+
+class GeminiBackend(ChatBackend):
+    """Google Gemini through the google-generativeai SDK"""
+    name = 'gemini'
+
+    def __init__(self, api_key: str, model_name: str = 'gemini-2.5-flash'):
+        """
+        Configure the SDK
+
+        Raises:
+            ImportError: google-generativeai is not installed
+        """
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    @staticmethod
+    def _options(timeout: Optional[float]) -> Dict:
+        return {'request_options': {'timeout': timeout}} if timeout else {}
+
+    @staticmethod
+    def _translate(error: Exception) -> Exception:
+        """Map google.api_core errors onto BackendError with a retryable flag"""
+        code = getattr(error, 'code', None)
+        if isinstance(code, int):
+            return BackendError(str(error), code, code == 429 or code >= 500)
+        return error
+
+    def generate(self, contents: Contents, timeout: Optional[float] = None) -> str:
+        try:
+            return self.model.generate_content(contents, **self._options(timeout)).text
+        except Exception as e:
+            raise self._translate(e) from e
+
+    def stream(self, contents: Contents, timeout: Optional[float] = None) -> Iterator[str]:
+        try:
+            for chunk in self.model.generate_content(contents, stream=True,
+                                                     **self._options(timeout)):
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            raise self._translate(e) from e
+
+    async def agenerate(self, contents: Contents, timeout: Optional[float] = None) -> str:
+        try:
+            response = await self.model.generate_content_async(contents, **self._options(timeout))
+        except Exception as e:
+            raise self._translate(e) from e
+        return response.text
+
+
+class HttpBackend(ChatBackend):
+    """
+    JSON-over-HTTP backend (see mock_chat_server.py):
+    POST /generate {"contents": [...]} -> {"text": "..."}
+    POST /stream   {"contents": [...]} -> one {"text": "..."} JSON object per line
+    """
+    name = 'http'
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def probe_address(self) -> Optional[Tuple[str, int]]:
+        parts = urllib.parse.urlsplit(self.url)
+        return parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80)
+
+    def _post(self, path: str, contents: Contents, timeout: Optional[float]):
+        request = urllib.request.Request(
+            self.url + path, data=json.dumps({'contents': contents}).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}, method='POST')
+        try:
+            return urllib.request.urlopen(request, timeout=timeout or self.timeout)
+        except urllib.error.HTTPError as e:
+            retryable = e.code == 429 or e.code >= 500
+            raise BackendError(f'{self.url}{path} returned HTTP {e.code}', e.code, retryable) from e
+        except socket.timeout as e:
+            raise TimeoutError(f'{self.url}{path} timed out') from e
+        except urllib.error.URLError as e:
+            if isinstance(e.reason, socket.timeout):
+                raise TimeoutError(f'{self.url}{path} timed out') from e
+            # reported as a network failure, so the connectivity monitor sees it
+            raise ConnectionError(f'{self.url}{path} unreachable: {e}') from e
+
+    def generate(self, contents: Contents, timeout: Optional[float] = None) -> str:
+        with self._post('/generate', contents, timeout) as response:
+            return json.loads(response.read())['text']
+
+    def stream(self, contents: Contents, timeout: Optional[float] = None) -> Iterator[str]:
+        with self._post('/stream', contents, timeout) as response:
+            for line in response:
+                if line.strip():
+                    text = json.loads(line)['text']
+                    if text:
+                        yield text
@@ -4,26 +4,165 @@ Handles chat interactions with Google's Gemini API or fallback to local response
 """
 
 import json
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import CancelledError, Future
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Callable, Optional
 import socket
 
+from chat_backends import ChatBackend, GeminiBackend
+from conversation_history import ConversationHistory
+from keyword_matcher import KeywordMatcher, load_intents
+from request_policy import CircuitBreaker, RetryPolicy, SingleFlight, is_retryable
+from response_cache import ResponseCache, normalize_question
+
 
 def check_internet_connection(host="8.8.8.8", port=53, timeout=3):
     """Check if device has internet connection"""
     try:
-        socket.create_connection((host, port), timeout=timeout)
-        return True
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
     except (socket.timeout, socket.error):
         return False
 
 
+class ConnectivityMonitor:
+    """
+    Cached connectivity state. Reads never block: a stale result triggers a
+    probe on a background thread and the last known state is returned
+    meanwhile. Outcomes of real API calls count as fresh results too.
+    """
+    def __init__(self, host: str = "8.8.8.8", port: int = 53, timeout: float = 3.0,
+                 online_ttl: float = 60.0, offline_ttl: float = 10.0):
+        """
+        Initialize the monitor and start the first probe
+        
+        Args:
+            host: Host probed with a TCP connection
+            port: Port probed on `host`
+            timeout: Probe timeout in seconds
+            online_ttl: Seconds an online result is trusted
+            offline_ttl: Seconds an offline result is trusted (shorter, so
+                coming back online is noticed quickly)
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.online_ttl = online_ttl
+        self.offline_ttl = offline_ttl
+        # optimistic until the first probe finishes; a failing API call corrects it
+        self._online = True
+        self._checked_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+        self.refresh()
+    
+    def is_online(self) -> bool:
+        """Last known state; starts a background probe if it is stale"""
+        with self._lock:
+            online = self._online
+            ttl = self.online_ttl if online else self.offline_ttl
+            stale = self._checked_at is None or time.monotonic() - self._checked_at >= ttl
+        if stale:
+            self.refresh()
+        return online
+    
+    def refresh(self):
+        """Probe on a background thread unless a probe is already running"""
+        with self._lock:
+            if self._probing:
+                return
+            self._probing = True
+        threading.Thread(target=self._probe, name='connectivity-probe', daemon=True).start()
+    
+    def _probe(self):
+        try:
+            online = check_internet_connection(self.host, self.port, self.timeout)
+        finally:
+            with self._lock:
+                self._probing = False
+        self._set(online)
+    
+    def _set(self, online: bool):
+        with self._lock:
+            if online != self._online:
+                print(f"[INFO] Connectivity changed: {'online' if online else 'offline'}")
+            self._online = online
+            self._checked_at = time.monotonic()
+    
+    def report_success(self):
+        """An API call went through, so we are online"""
+        self._set(True)
+    
+    def report_failure(self, error: Exception):
+        """
+        An API call failed. Network errors mark us offline right away; for
+        anything else (timeouts included) the state is re-checked in the
+        background.
+        """
+        if isinstance(error, (ConnectionError, socket.gaierror)):
+            self._set(False)
+        else:
+            self.refresh()
+
+
+class _RequestWorker:
+    """
+    Runs submitted calls one at a time, in order, on a daemon thread.
+    Unlike a ThreadPoolExecutor worker it does not hold up interpreter exit
+    while a request is still waiting on the network.
+    """
+    def __init__(self, name: str = 'chatbot'):
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn: Callable, *args) -> Future:
+        future: Future = Future()
+        self._queue.put((future, fn, args))
+        return future
+
+    def shutdown(self):
+        """Cancel the calls that have not started; a running one is abandoned"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[0].cancel()
+        self._queue.put(None)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+
 class ChatbotResponse:
     """Structured response from the chatbot"""
     def __init__(self, message: str, is_error: bool = False, timestamp: Optional[str] = None):
         self.message = message
         self.is_error = is_error
         self.timestamp = timestamp or datetime.now().strftime("%H:%M")
+        # API replies only: seconds from the request to the first chunk and to the full reply
+        self.time_to_first_token: Optional[float] = None
+        self.total_time: Optional[float] = None
+        self.from_cache = False
 
 
 class FitProChatbot:
@@ -41,19 +180,58 @@ class FitProChatbot:
         "motivation": "Remember: every step counts! Consistency beats perfection. Celebrate small wins and keep moving forward!",
         "tired": "Rest is important for recovery! Make sure you're getting 7-9 hours of sleep and staying hydrated.",
     }
+    # Greetings lose to any topic keyword in the same message
+    GREETING_KEYWORDS = ("hello", "hi", "how are you")
+    
+    # Replies when no keyword matches
+    GENERIC_RESPONSES = (
+        "That's a great question! In general, consistency and listening to your body are key to fitness success.",
+        "Great question about fitness! Make sure to stay hydrated, warm up before exercise, and rest between workouts.",
+        "Interesting! Remember that everyone's fitness journey is unique. Focus on progress, not perfection!",
+        "Good thinking! The best workout is the one you'll actually do. Find what you enjoy!",
+        "Nice question! Building a routine that fits your lifestyle is more important than perfection.",
+        "That's important! Remember that rest and recovery are just as crucial as the workout itself.",
+        "Absolutely! Nutrition plays a huge role in achieving your fitness goals.",
+        "Smart thinking! Tracking your progress helps you stay motivated and see improvements over time.",
+        "Great mindset! Starting small and building up gradually is the best approach to long-term success.",
+        "Exactly! Combining cardio, strength training, and flexibility work gives you a well-rounded fitness routine.",
+    )
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Additional offline intents, merged with DEFAULT_RESPONSES
+    INTENTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fitness_intents.json")
+    _matcher: Optional[KeywordMatcher] = None
+    
+    def __init__(self, api_key: Optional[str] = None, cache_path: Optional[str] = None,
+                 backend: Optional[ChatBackend] = None):
         """
         Initialize the chatbot
         
         Args:
             api_key: Optional Google Gemini API key. If not provided, uses fallback responses
+            cache_path: Optional SQLite file for caching API answers to
+                context-free questions
+            backend: Backend to use instead of Gemini (e.g. an HttpBackend
+                pointed at mock_chat_server.py); api_key is then ignored
         """
         self.api_key = api_key
         self.use_api = False
         self.client = None
-        self.model = None
-        self.chat_history: List[Dict] = []
+        self.backend: Optional[ChatBackend] = None
+        self.response_cache: Optional[ResponseCache] = None
+        if cache_path:
+            try:
+                self.response_cache = ResponseCache(cache_path)
+            except Exception as e:
+                print(f"[WARN] Response cache unavailable: {e}")
+        # deadlines and retries per request, offline mode while the service
+        # keeps failing, and one API call for identical messages in flight
+        self.retry_policy = RetryPolicy()
+        self.breaker = CircuitBreaker()
+        self._single_flight = SingleFlight()
+        # single worker so requests run in order and never touch
+        # chat_history concurrently; created on first submit()
+        self._executor: Optional[_RequestWorker] = None
+        self._generation = 0
         self.system_prompt = """You are a friendly and knowledgeable fitness assistant for the FitPro app. 
 You help users with:
 - Fitness advice and workout recommendations
@@ -64,21 +242,30 @@ You help users with:
 
 Be concise, friendly, and encouraging. Keep responses to 2-3 sentences unless more detail is requested.
 If the question is not fitness-related, politely redirect to fitness topics."""
+        # API context: the prompt pinned once, recent turns, and a running
+        # summary of older ones within a token budget
+        self.chat_history = ConversationHistory(self.system_prompt)
         
         # Try to initialize Google Gemini API
-        if api_key:
+        if backend is not None:
+            self.backend = backend
+            self.use_api = True
+            print(f"[INFO] Using {backend.name} chat backend")
+        elif api_key:
             self._init_gemini(api_key)
             if not self.use_api:
                 print("[INFO] API key provided but initialization failed. Using fallback mode.")
         else:
             print("[INFO] No API key provided. Using fallback responses.")
+        
+        # probe the backend's own server when it has one (e.g. a local mock)
+        probe = self.backend.probe_address() if self.backend is not None else None
+        self.connectivity = ConnectivityMonitor(*probe) if probe else ConnectivityMonitor()
     
     def _init_gemini(self, api_key: str):
         """Initialize Google Gemini API"""
         try:
-            import google.generativeai as genai
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-2.5-flash')
+            self.backend = GeminiBackend(api_key)
             self.use_api = True
             print("[INFO] Gemini API initialized successfully")
         except ImportError:
@@ -86,12 +273,15 @@ If the question is not fitness-related, politely redirect to fitness topics."""
         except Exception as e:
             print(f"[WARN] Failed to initialize Gemini API: {e}. Using fallback responses.")
     
-    def get_response(self, user_message: str) -> ChatbotResponse:
+    def get_response(self, user_message: str,
+                     on_chunk: Optional[Callable[[str], None]] = None) -> ChatbotResponse:
         """
         Get a response to a user message
         
         Args:
             user_message: The user's input message
+            on_chunk: If given, the API reply is streamed and this is called
+                with each piece of text as it arrives (on the calling thread)
             
         Returns:
             ChatbotResponse object with the assistant's response
@@ -99,13 +289,19 @@ If the question is not fitness-related, politely redirect to fitness topics."""
         if not user_message.strip():
             return ChatbotResponse("Please type a message to get started!")
         
-        # Check internet connection
-        has_internet = check_internet_connection()
+        # Cached connection state, never waits on the network
+        has_internet = self.connectivity.is_online()
         
         try:
-            if self.use_api and self.model and has_internet:
-                return self._get_api_response(user_message)
-            elif self.use_api and self.model and not has_internet:
+            cached = self._get_cached_response(user_message) if self.use_api else None
+            if cached is not None:
+                return cached
+            if self.use_api and self.backend and has_internet:
+                if not self.breaker.allow():
+                    # offline mode until the breaker lets a trial request through
+                    return self._get_fallback_response(user_message)
+                return self._get_api_response(user_message, on_chunk)
+            elif self.use_api and self.backend and not has_internet:
                 return ChatbotResponse("❌ No internet connection. Unable to reach AI. Please check your connection.")
             else:
                 return self._get_fallback_response(user_message)
@@ -118,75 +314,159 @@ If the question is not fitness-related, politely redirect to fitness topics."""
                 is_error=True
             )
     
-    def _get_api_response(self, user_message: str) -> ChatbotResponse:
+    def _get_api_response(self, user_message: str,
+                          on_chunk: Optional[Callable[[str], None]] = None) -> ChatbotResponse:
         """Get response using Google Gemini API with conversation history"""
+        # every call settles the breaker, or a half-open trial never ends
+        settled = False
         try:
-            # Add user message to history
-            self.chat_history.append({
-                "role": "user",
-                "parts": [user_message]
-            })
-            
-            # Start with system prompt as first message
-            if not self.chat_history or (len(self.chat_history) > 0 and self.chat_history[0].get("role") != "system"):
-                self.chat_history.insert(0, {
-                    "role": "user",
-                    "parts": [self.system_prompt]
-                })
+            start = time.perf_counter()
+            first_turn = self._is_first_turn()
+            self.chat_history.append("user", user_message)
             
             # Use conversation history for context-aware responses
-            response = self.model.generate_content(
-                [{"role": msg["role"], "parts": msg["parts"]} for msg in self.chat_history]
-            )
-            assistant_message = response.text
+            contents = self.chat_history.messages
+            time_to_first_token = None
+            parts = []
+            
+            def attempt(timeout: float) -> str:
+                nonlocal time_to_first_token
+                if on_chunk is None:
+                    return self.backend.generate(contents, timeout)
+                for text in self.backend.stream(contents, timeout):
+                    if time_to_first_token is None:
+                        time_to_first_token = time.perf_counter() - start
+                    parts.append(text)
+                    on_chunk(text)
+                return ''.join(parts)
             
-            # Add assistant response to history
-            self.chat_history.append({
-                "role": "model",
-                "parts": [assistant_message]
-            })
+            # a stream that already showed text cannot be retried without repeating it
+            assistant_message = self.retry_policy.call(
+                attempt, lambda e: not parts and is_retryable(e))
+            self.breaker.record_success()
+            settled = True
+            self.connectivity.report_success()
+            # an answer given without earlier context fits anyone asking the same question
+            if first_turn and self.response_cache is not None:
+                self.response_cache.put(user_message, assistant_message)
             
-            # Keep only last 20 messages (10 exchanges) to manage token usage
-            if len(self.chat_history) > 20:
-                self.chat_history = self.chat_history[-20:]
+            # Add assistant response to history; folds old turns when over budget
+            self.chat_history.append("model", assistant_message)
             
-            return ChatbotResponse(assistant_message)
+            response = ChatbotResponse(assistant_message)
+            response.time_to_first_token = time_to_first_token
+            response.total_time = time.perf_counter() - start
+            if time_to_first_token is not None:
+                print(f"[INFO] Reply streamed: first token {time_to_first_token * 1000:.0f} ms, "
+                      f"complete {response.total_time * 1000:.0f} ms")
+            return response
         
         except Exception as e:
+            if not settled:
+                if is_retryable(e):
+                    self.breaker.record_failure()
+                else:
+                    # the service did answer, just not usefully (bad request, blocked reply)
+                    self.breaker.record_success()
+                settled = True
             print(f"[ERROR] API response error: {e}")
+            self.connectivity.report_failure(e)
+            # the unanswered message would leave two user turns in a row
+            if len(self.chat_history) and self.chat_history.messages[-1]["role"] == "user":
+                self.chat_history.pop()
             # Fallback to default response
             return self._get_fallback_response(user_message)
+        finally:
+            if not settled:
+                self.breaker.release()
+    
+    def _is_first_turn(self) -> bool:
+        """True while nothing has been said in the conversation yet"""
+        return self.chat_history.is_empty()
+    
+    def _get_cached_response(self, user_message: str) -> Optional[ChatbotResponse]:
+        """
+        Answer from the response cache, on the first turn only: once there is
+        a conversation, the same words may ask something else
+        """
+        if self.response_cache is None or not self._is_first_turn():
+            return None
+        answer = self.response_cache.get(user_message, allow_similar=True)
+        if answer is None:
+            return None
+        self.chat_history.append("user", user_message)
+        self.chat_history.append("model", answer)
+        response = ChatbotResponse(answer)
+        response.from_cache = True
+        return response
     
     def _get_fallback_response(self, user_message: str) -> ChatbotResponse:
         """Get response using predefined fitness responses"""
-        msg_lower = user_message.lower().strip()
+        response = self._fallback_matcher().best(user_message)
+        if response is None:
+            response = random.choice(self.GENERIC_RESPONSES)
+        return ChatbotResponse(response)
+    
+    @classmethod
+    def _fallback_matcher(cls) -> KeywordMatcher:
+        """Keyword matcher over the built-in and file intents, built once per process"""
+        if cls._matcher is None:
+            entries = [(key, 0 if key in cls.GREETING_KEYWORDS else 1, response)
+                       for key, response in cls.DEFAULT_RESPONSES.items()]
+            try:
+                entries += load_intents(cls.INTENTS_FILE)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"[WARN] Failed to load fallback intents: {e}")
+            cls._matcher = KeywordMatcher(entries)
+        return cls._matcher
+    
+    def submit(self, user_message: str,
+               on_chunk: Optional[Callable[[str], None]] = None) -> Future:
+        """
+        Get a response on the chatbot's worker thread instead of blocking the caller.
+        Sending a message identical to one still in flight joins that request
+        instead of calling the API again.
         
-        # Check for exact matches
-        for key, response in self.DEFAULT_RESPONSES.items():
-            if key in msg_lower:
-                return ChatbotResponse(response)
+        Args:
+            user_message: The user's input message
+            on_chunk: Streaming callback, see get_response(). It runs on the
+                worker thread.
+            
+        Returns:
+            Future resolving to a ChatbotResponse. It is cancelled if
+            cancel_pending() is called before the request starts.
+        """
+        if self._executor is None:
+            self._executor = _RequestWorker()
+        generation = self._generation
         
-        # Generic fitness response
-        generic_responses = [
-            "That's a great question! In general, consistency and listening to your body are key to fitness success.",
-            "Great question about fitness! Make sure to stay hydrated, warm up before exercise, and rest between workouts.",
-            "Interesting! Remember that everyone's fitness journey is unique. Focus on progress, not perfection!",
-            "Good thinking! The best workout is the one you'll actually do. Find what you enjoy!",
-            "Nice question! Building a routine that fits your lifestyle is more important than perfection.",
-            "That's important! Remember that rest and recovery are just as crucial as the workout itself.",
-            "Absolutely! Nutrition plays a huge role in achieving your fitness goals.",
-            "Smart thinking! Tracking your progress helps you stay motivated and see improvements over time.",
-            "Great mindset! Starting small and building up gradually is the best approach to long-term success.",
-            "Exactly! Combining cardio, strength training, and flexibility work gives you a well-rounded fitness routine.",
-        ]
+        def start(dispatch: Callable[[str], None]) -> Future:
+            return self._executor.submit(self._run_request, user_message,
+                                         dispatch if on_chunk is not None else None, generation)
         
-        import random
-        response = random.choice(generic_responses)
-        return ChatbotResponse(response)
+        key = f"{generation}:{normalize_question(user_message)}"
+        return self._single_flight.run(key, start, on_chunk)
+    
+    def _run_request(self, user_message: str, on_chunk: Optional[Callable[[str], None]],
+                     generation: int) -> ChatbotResponse:
+        if generation != self._generation:
+            raise CancelledError()
+        return self.get_response(user_message, on_chunk)
+    
+    def cancel_pending(self):
+        """Drop requests submitted so far that have not started yet"""
+        self._generation += 1
+    
+    def shutdown(self):
+        """Cancel queued requests and stop the worker thread (call on app exit)"""
+        self.cancel_pending()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
     
     def clear_history(self):
         """Clear chat history"""
-        self.chat_history = []
+        self.chat_history.clear()
 
 
 class ChatMessage:
@@ -0,0 +1,248 @@
+"""
+Clock Profiler Module for FitPro
+Opt-in timing of Clock callbacks and frame times on the device itself.
+Callbacks decorated with @profiled are timed while the profiler is on; a
+frame-time histogram is kept, a small overlay shows p50/p95/p99 frame times
+and the most expensive callbacks, and the recorded events can be dumped as
+a Chrome trace file (chrome://tracing, https://ui.perfetto.dev).
+
+Turn it on with FITPRO_PROFILE=1 (or true/yes/on), or by triple-tapping the dashboard header.
+While it is off, a profiled callback costs one attribute check.
+"""
+
+import functools
+import json
+import math
+import os
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from kivy.clock import Clock
+from kivy.graphics import Color, Rectangle
+from kivy.metrics import dp, sp
+from kivy.uix.label import Label
+
+
+class CallbackStats:
+    """Calls and time spent in one profiled callback"""
+    __slots__ = ('calls', 'total', 'max')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class ClockProfiler:
+    """
+    Frame-time histogram, per-callback statistics and a bounded buffer of
+    trace events, all recorded on the UI thread while enabled
+    """
+    # histogram bins of BIN_MS up to MAX_FRAME_MS; slower frames share the last bin
+    BIN_MS = 0.25
+    MAX_FRAME_MS = 100.0
+    # trace events kept (the oldest are dropped first)
+    TRACE_SIZE = 100000
+
+    def __init__(self):
+        self.enabled = False
+        # directory dump_trace() writes to by default (set by the app)
+        self.trace_dir: Optional[str] = None
+        self._origin = time.perf_counter()
+        self._frame_event = None
+        self._overlay: Optional['ProfilerOverlay'] = None
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        self.histogram: List[int] = [0] * (int(self.MAX_FRAME_MS / self.BIN_MS) + 1)
+        self.frames = 0
+        self.callbacks: Dict[str, CallbackStats] = {}
+        # (name, track, start, duration) in seconds since _origin
+        self.trace: Deque[Tuple[str, int, float, float]] = deque(maxlen=self.TRACE_SIZE)
+        self.started_at = time.perf_counter()
+        self._last_frame: Optional[float] = None
+
+    def enable(self, overlay: bool = True):
+        """Start recording (from scratch) and optionally show the overlay"""
+        if self.enabled:
+            return
+        self.reset()
+        self.enabled = True
+        self._frame_event = Clock.schedule_interval(self._on_frame, 0)
+        if overlay:
+            self._overlay = ProfilerOverlay(self)
+            self._overlay.show()
+        print('[INFO] Clock profiler enabled')
+
+    def disable(self, dump: bool = True) -> Optional[str]:
+        """Stop recording, hide the overlay and dump the trace; returns the trace path"""
+        if not self.enabled:
+            return None
+        self.enabled = False
+        self._frame_event.cancel()
+        self._frame_event = None
+        if self._overlay is not None:
+            self._overlay.hide()
+            self._overlay = None
+        print(f'[INFO] Clock profiler disabled\n{self.summary()}')
+        return self.dump_trace() if dump else None
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    def record(self, name: str, start: float, end: float):
+        """Account one call of callback `name` (perf_counter times)"""
+        stats = self.callbacks.get(name)
+        if stats is None:
+            stats = self.callbacks[name] = CallbackStats()
+        duration = end - start
+        stats.calls += 1
+        stats.total += duration
+        if duration > stats.max:
+            stats.max = duration
+        self.trace.append((name, 1, start - self._origin, duration))
+
+    def _on_frame(self, dt):
+        # time between the starts of two consecutive frames
+        now = time.perf_counter()
+        if self._last_frame is not None:
+            frame = now - self._last_frame
+            self.histogram[min(int(frame * 1000 / self.BIN_MS), len(self.histogram) - 1)] += 1
+            self.frames += 1
+            self.trace.append(('frame', 0, self._last_frame - self._origin, frame))
+        self._last_frame = now
+
+    def percentile(self, p: float) -> float:
+        """
+        Frame time (ms) below which `p` percent of the frames fall, from the
+        histogram; infinity if that is beyond MAX_FRAME_MS
+        """
+        if not self.frames:
+            return 0.0
+        rank = p / 100.0 * self.frames
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            seen += count
+            if seen >= rank:
+                break
+        if i == len(self.histogram) - 1:
+            return math.inf
+        return (i + 1) * self.BIN_MS
+
+    def top_callbacks(self, n: int = 5) -> List[Tuple[str, CallbackStats]]:
+        """Callbacks with the most total time, most expensive first"""
+        return sorted(self.callbacks.items(), key=lambda item: item[1].total, reverse=True)[:n]
+
+    def summary(self, top: int = 5) -> str:
+        """Frame percentiles and the top callbacks as text"""
+        elapsed = max(1e-9, time.perf_counter() - self.started_at)
+        p50, p95, p99 = (_format_ms(self.percentile(p)) for p in (50, 95, 99))
+        lines = [f'frame p50 {p50}  p95 {p95}  p99 {p99} ms  ({self.frames} frames)']
+        for name, stats in self.top_callbacks(top):
+            lines.append(f'{name:<34} {stats.total * 1000 / elapsed:6.2f} ms/s  '
+                         f'avg {stats.total * 1000 / stats.calls:5.2f}  max {stats.max * 1000:5.1f} ms')
+        return '\n'.join(lines)
+
+    def dump_trace(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Write the recorded events in the Chrome trace event format
+
+        Args:
+            path: Output file (default: a timestamped file in trace_dir or the
+                working directory)
+
+        Returns:
+            str: The file written, or None if writing failed
+        """
+        if path is None:
+            directory = self.trace_dir or os.getcwd()
+            path = os.path.join(directory, time.strftime('fitpro-trace-%Y%m%d-%H%M%S.json'))
+        pid = os.getpid()
+        events = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': 'frames'}},
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': 1, 'args': {'name': 'callbacks'}},
+        ]
+        events.extend({'name': name, 'ph': 'X', 'pid': pid, 'tid': track,
+                       'ts': round(start * 1e6, 1), 'dur': round(duration * 1e6, 1)}
+                      for name, track, start, duration in list(self.trace))
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        except OSError as e:
+            print(f'[WARN] Could not write trace file: {e}')
+            return None
+        print(f'[INFO] Trace with {len(events) - 2} events written to {path}')
+        return path
+
+
+def _format_ms(ms: float) -> str:
+    return f'>{ClockProfiler.MAX_FRAME_MS:.0f}' if math.isinf(ms) else f'{ms:.1f}'
+
+
+class ProfilerOverlay(Label):
+    """Corner label with the profiler's summary, refreshed twice a second"""
+    REFRESH_INTERVAL = 0.5
+
+    def __init__(self, profiler: ClockProfiler, **kwargs):
+        super().__init__(font_name='RobotoMono-Regular', font_size=sp(10), halign='left',
+                         valign='top', color=(0.6, 1, 0.6, 1), size_hint=(None, None), **kwargs)
+        self.profiler = profiler
+        self._event = None
+        self.bind(texture_size=lambda *args: setattr(self, 'size', self.texture_size))
+        with self.canvas.before:
+            Color(0, 0, 0, 0.65)
+            self._background = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self._move_background, size=self._move_background)
+
+    def _move_background(self, *args):
+        self._background.pos = self.pos
+        self._background.size = self.size
+
+    def show(self):
+        from kivy.core.window import Window
+        Window.add_widget(self)
+        self._refresh(0)
+        self._event = Clock.schedule_interval(self._refresh, self.REFRESH_INTERVAL)
+
+    def hide(self):
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        if self.parent is not None:
+            self.parent.remove_widget(self)
+
+    def _refresh(self, dt):
+        self.text = self.profiler.summary()
+        if self.parent is not None:
+            self.pos = (dp(4), self.parent.height - self.height - dp(4))
+
+
+def profiling_requested(environ=os.environ) -> bool:
+    """True if FITPRO_PROFILE asks for the profiler at start-up ("0", "false" etc. do not)"""
+    return environ.get('FITPRO_PROFILE', '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# process-wide profiler, used by @profiled
+PROFILER = ClockProfiler()
+
+
+def profiled(fn: Callable) -> Callable:
+    """Time calls of `fn` while PROFILER is enabled (UI thread callbacks only)"""
+    name = fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not PROFILER.enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            PROFILER.record(name, start, time.perf_counter())
+    return wrapper
@@ -0,0 +1,134 @@
+"""
+Conversation History Module for FitPro
+Keeps the chat context sent with each API request within a token budget.
+The system prompt is pinned once at the front; when the budget is exceeded
+the oldest turns are folded into a running summary, so the payload stays
+bounded however long the conversation runs.
+"""
+
+import re
+from typing import Callable, Dict, List, Optional
+
+# Rough tokens per character for English text, and per-message overhead
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s')
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate of one message, including its framing overhead"""
+    return -(-len(text) // CHARS_PER_TOKEN) + MESSAGE_OVERHEAD_TOKENS
+
+
+def first_sentence(text: str, max_chars: int = 120) -> str:
+    """First sentence of `text`, cut to `max_chars`"""
+    sentence = _SENTENCE_END.split(text.strip(), 1)[0]
+    if len(sentence) > max_chars:
+        sentence = sentence[:max_chars - 3].rstrip() + '...'
+    return sentence
+
+
+def extractive_summary(summary: str, folded: List[Dict]) -> str:
+    """Default summarizer: append the first sentence of each folded message"""
+    lines = [summary] if summary else []
+    for msg in folded:
+        who = 'User' if msg['role'] == 'user' else 'Assistant'
+        lines.append(f'{who}: {first_sentence(msg["parts"][0])}')
+    return '\n'.join(lines)
+
+
+class ConversationHistory:
+    """API-ready message list with a pinned system prompt and a token budget"""
+    def __init__(self, system_prompt: str, token_budget: int = 2000, keep_recent: int = 4,
+                 summary_budget: int = 400,
+                 summarizer: Optional[Callable[[str, List[Dict]], str]] = None):
+        """
+        Initialize an empty conversation
+
+        Args:
+            system_prompt: Instructions pinned as the first message
+            token_budget: Estimated tokens allowed for the whole payload
+            keep_recent: Most recent messages never folded into the summary
+            summary_budget: Estimated tokens the running summary may use;
+                its oldest lines are dropped beyond that
+            summarizer: summarizer(summary, folded_messages) -> new summary;
+                defaults to extractive_summary
+        """
+        self.system_prompt = system_prompt
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.summary_budget = summary_budget
+        self.summarizer = summarizer or extractive_summary
+        self.summary = ''
+        # messages[0] is the pinned prompt; the rest are {"role", "parts"}
+        # dicts in the API's format, so requests can send the list as is
+        self._messages: List[Dict] = [{"role": "user", "parts": [system_prompt]}]
+        self._tokens: List[int] = [estimate_tokens(system_prompt)]
+        self.total_tokens = self._tokens[0]
+
+    def __len__(self) -> int:
+        """Number of conversation messages, excluding the pinned prompt"""
+        return len(self._messages) - 1
+
+    def is_empty(self) -> bool:
+        """True if nothing has been said yet (no messages and no summary)"""
+        return len(self._messages) == 1 and not self.summary
+
+    @property
+    def messages(self) -> List[Dict]:
+        """Payload for the API, pinned prompt first. Do not modify."""
+        return self._messages
+
+    def append(self, role: str, text: str):
+        """Add a message ("user" or "model"), folding old turns if over budget"""
+        tokens = estimate_tokens(text)
+        self._messages.append({"role": role, "parts": [text]})
+        self._tokens.append(tokens)
+        self.total_tokens += tokens
+        if self.total_tokens > self.token_budget:
+            self._fold()
+
+    def pop(self) -> Optional[Dict]:
+        """Remove and return the newest message (e.g. a request that failed)"""
+        if len(self._messages) == 1:
+            return None
+        self.total_tokens -= self._tokens.pop()
+        return self._messages.pop()
+
+    def _fold(self):
+        """Fold the oldest turns into the summary until the budget is met"""
+        removable = len(self._messages) - 1 - self.keep_recent
+        if removable <= 0:
+            return
+        excess = self.total_tokens - self.token_budget
+        count = freed = 0
+        while count < removable and freed < excess:
+            count += 1
+            freed += self._tokens[count]
+        # fold whole user/model exchanges so the kept turns start with the user
+        while count < removable and self._messages[count + 1]['role'] != 'user':
+            count += 1
+        folded = self._messages[1:count + 1]
+        del self._messages[1:count + 1]
+        del self._tokens[1:count + 1]
+        self._set_summary(self.summarizer(self.summary, folded))
+
+    def _set_summary(self, summary: str):
+        """Store the summary (trimmed to its budget) in the pinned message"""
+        lines = summary.split('\n')
+        while len(lines) > 1 and estimate_tokens('\n'.join(lines)) > self.summary_budget:
+            lines.pop(0)
+        self.summary = '\n'.join(lines)
+        pinned = self.system_prompt
+        if self.summary:
+            pinned += f'\n\nSummary of the earlier conversation:\n{self.summary}'
+        self._messages[0] = {"role": "user", "parts": [pinned]}
+        self._tokens[0] = estimate_tokens(pinned)
+        self.total_tokens = sum(self._tokens)
+
+    def clear(self):
+        """Forget the conversation and its summary; the prompt stays pinned"""
+        del self._messages[1:]
+        del self._tokens[1:]
+        self._set_summary('')
@@ -3,6 +3,51 @@ Fitness Calculation Module
 Calculates stride length and calories burned based on user data and established fitness formulas.
 """
 
+import heapq
+from array import array
+
+
+def _numpy():
+    """NumPy, imported on first batch call (it is slow to import), or None"""
+    global _np
+    if _np is False:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:  # batch functions fall back to pure Python
+            _np = None
+    return _np
+
+
+_np = False  # not tried yet
+
+
+# Gender codes used by the batch API (index into STRIDE_MULTIPLIERS)
+GENDER_MALE = 0
+GENDER_FEMALE = 1
+GENDER_OTHER = 2
+
+# Stride length as a fraction of height, indexed by gender code
+STRIDE_MULTIPLIERS = (0.415, 0.413, 0.414)
+
+
+def gender_code(gender):
+    """
+    Map a gender string to its batch gender code.
+    
+    Args:
+        gender (str): User's gender ("male", "female", or other)
+    
+    Returns:
+        int: GENDER_MALE, GENDER_FEMALE or GENDER_OTHER
+    """
+    gender_lower = gender.lower().strip()
+    if gender_lower == "male":
+        return GENDER_MALE
+    if gender_lower == "female":
+        return GENDER_FEMALE
+    return GENDER_OTHER
+
 
 def calculate_stride_length(height_cm, gender="male"):
     """
@@ -20,14 +65,7 @@ def calculate_stride_length(height_cm, gender="male"):
         Female: Stride Length (cm) = Height (cm) × 0.413
         Other: Stride Length (cm) = Height (cm) × 0.414
     """
-    gender_lower = gender.lower().strip()
-    
-    if gender_lower == "male":
-        stride_multiplier = 0.415
-    elif gender_lower == "female":
-        stride_multiplier = 0.413
-    else:
-        stride_multiplier = 0.414
+    stride_multiplier = STRIDE_MULTIPLIERS[gender_code(gender)]
     
     stride_length_cm = height_cm * stride_multiplier
     return stride_length_cm
@@ -58,6 +96,225 @@ def calculate_calories_burned(steps, weight_kg, stride_length_cm):
     return calories_burned
 
 
+class MetricProfile:
+    """
+    Per-user coefficients for turning a step count into distance and calories.
+    
+    The stride length and per-step factors are computed once and only rebuilt
+    by update() when height, weight or gender actually change, so converting
+    a step count costs a single multiplication per metric.
+    """
+    __slots__ = ("height_cm", "weight_kg", "gender",
+                 "stride_length_cm", "km_per_step", "kcal_per_step")
+    
+    def __init__(self, height_cm, weight_kg, gender="male"):
+        self.height_cm = None
+        self.weight_kg = None
+        self.gender = None
+        self.update(height_cm, weight_kg, gender)
+    
+    def update(self, height_cm, weight_kg, gender):
+        """
+        Rebuild the coefficients if any of the user data changed.
+        
+        Returns:
+            bool: True if the coefficients were rebuilt
+        """
+        if (height_cm == self.height_cm and weight_kg == self.weight_kg
+                and gender == self.gender):
+            return False
+        self.height_cm = height_cm
+        self.weight_kg = weight_kg
+        self.gender = gender
+        self.stride_length_cm = calculate_stride_length(height_cm, gender)
+        self.km_per_step = self.stride_length_cm / 100000
+        self.kcal_per_step = 0.5 * weight_kg * self.km_per_step
+        return True
+    
+    def distance_km(self, steps):
+        """Distance in kilometers covered by `steps` steps"""
+        return steps * self.km_per_step
+    
+    def calories(self, steps):
+        """Calories (kcal) burned over `steps` steps"""
+        return steps * self.kcal_per_step
+
+
+def _as_sequence(values, length):
+    """Return `values` as an indexable sequence, repeating scalars `length` times."""
+    if isinstance(values, (int, float)):
+        return (values,) * length
+    return values
+
+
+def calculate_distance_and_calories_batch(steps, heights_cm, weights_kg, genders):
+    """
+    Calculate distance and calories burned for many samples in one pass.
+    
+    Every argument may be a NumPy array, any buffer-protocol sequence
+    (array.array, memoryview, bytes-backed buffers) or a plain sequence.
+    Scalars are broadcast against the other arguments. Results match
+    calculate_stride_length() + calculate_calories_burned() exactly, since
+    the same operations are applied in the same order.
+    
+    Args:
+        steps: Number of steps per sample
+        heights_cm: User's height in centimeters per sample
+        weights_kg: User's weight in kilograms per sample
+        genders: Gender codes per sample (GENDER_MALE, GENDER_FEMALE, GENDER_OTHER)
+    
+    Returns:
+        tuple: (distance_km, calories_kcal) as float64 NumPy arrays, or as
+        array('d') when NumPy is not installed
+    """
+    np = _numpy()
+    if np is not None:
+        steps = np.asarray(steps, dtype=np.float64)
+        heights_cm = np.asarray(heights_cm, dtype=np.float64)
+        weights_kg = np.asarray(weights_kg, dtype=np.float64)
+        codes = np.asarray(genders, dtype=np.intp)
+        
+        multipliers = np.asarray(STRIDE_MULTIPLIERS, dtype=np.float64)
+        stride_length_cm = heights_cm * multipliers[codes]
+        total_distance_km = (steps * stride_length_cm) / 100000
+        calories_burned = 0.5 * weights_kg * total_distance_km
+        return total_distance_km, calories_burned
+    
+    # Pure Python fallback: same formula, one loop over the samples
+    lengths = [len(v) for v in (steps, heights_cm, weights_kg, genders)
+               if not isinstance(v, (int, float))]
+    count = max(lengths) if lengths else 1
+    steps = _as_sequence(steps, count)
+    heights_cm = _as_sequence(heights_cm, count)
+    weights_kg = _as_sequence(weights_kg, count)
+    genders = _as_sequence(genders, count)
+    
+    distances = array('d', bytes(8 * count))
+    calories = array('d', bytes(8 * count))
+    for i in range(count):
+        stride_length_cm = heights_cm[i] * STRIDE_MULTIPLIERS[int(genders[i])]
+        total_distance_km = (steps[i] * stride_length_cm) / 100000
+        distances[i] = total_distance_km
+        calories[i] = 0.5 * weights_kg[i] * total_distance_km
+    return distances, calories
+
+
+def step_delta(previous_count, current_count):
+    """
+    Steps taken between two cumulative step-counter readings.
+    
+    Args:
+        previous_count (int): Earlier cumulative reading
+        current_count (int): Later cumulative reading
+    
+    Returns:
+        int: Steps taken in between. A drop in the counter means the sensor
+        was reset (e.g. device reboot), so the new reading counts from zero.
+    """
+    if current_count < previous_count:
+        return current_count
+    return current_count - previous_count
+
+
+# Rollup resolutions produced by aggregate_step_samples(), in seconds
+ROLLUP_RESOLUTIONS = (("minute", 60), ("hour", 3600), ("day", 86400))
+
+
+class StepRollup:
+    """Steps, distance and calories accumulated over one time bucket"""
+    __slots__ = ("resolution", "start", "steps", "distance_km", "calories")
+    
+    def __init__(self, resolution, start, steps, distance_km, calories):
+        self.resolution = resolution
+        self.start = start
+        self.steps = steps
+        self.distance_km = distance_km
+        self.calories = calories
+    
+    def __repr__(self):
+        return (f"StepRollup({self.resolution!r}, start={self.start}, steps={self.steps}, "
+                f"distance_km={self.distance_km:.3f}, calories={self.calories:.1f})")
+
+
+def aggregate_step_samples(samples, height_cm, weight_kg, gender="male",
+                           reorder_window=30.0, utc_offset=0):
+    """
+    Roll cumulative step-counter readings up into minute, hour and day totals.
+    
+    Generator: consumes `samples` lazily and yields each StepRollup as soon as
+    its bucket is closed, so memory stays constant however long the history.
+    Open buckets are flushed when the input is exhausted.
+    
+    Args:
+        samples: Iterable of (timestamp, cumulative_steps) readings, with
+            timestamps in seconds since the epoch
+        height_cm (float): User's height in centimeters
+        weight_kg (float): User's weight in kilograms
+        gender (str): User's gender ("male", "female", or other)
+        reorder_window (float): Seconds a reading may arrive late and still be
+            put back in order. Readings older than that are dropped; since the
+            counter is cumulative their steps are still counted by the next
+            reading, only attributed to its bucket.
+        utc_offset (int): Seconds added to timestamps before bucketing, so
+            hour and day boundaries follow local time
+    
+    Yields:
+        StepRollup: Closed buckets, in time order per resolution
+    """
+    stride_length_cm = calculate_stride_length(height_cm, gender)
+    
+    pending = []          # min-heap of (timestamp, seq, count) inside the window
+    seq = 0
+    newest = None         # newest timestamp seen so far
+    last_ts = None        # timestamp of the last reading applied
+    last_count = None     # cumulative count of the last reading applied
+    open_buckets = [None] * len(ROLLUP_RESOLUTIONS)  # [start, steps] per resolution
+    
+    def apply(ts, count):
+        nonlocal last_ts, last_count
+        if last_ts is not None and ts < last_ts:
+            return  # too late to be reordered
+        if last_count is None:
+            delta = 0  # first reading only establishes the baseline
+        else:
+            delta = step_delta(last_count, count)
+        last_ts, last_count = ts, count
+        
+        local_ts = ts + utc_offset
+        for i, (name, size) in enumerate(ROLLUP_RESOLUTIONS):
+            start = int(local_ts // size) * size - utc_offset
+            bucket = open_buckets[i]
+            if bucket is not None and bucket[0] != start:
+                yield _make_rollup(name, bucket, weight_kg, stride_length_cm)
+                bucket = None
+            if bucket is None:
+                open_buckets[i] = bucket = [start, 0]
+            bucket[1] += delta
+    
+    for ts, count in samples:
+        heapq.heappush(pending, (ts, seq, count))
+        seq += 1
+        if newest is None or ts > newest:
+            newest = ts
+        while pending and pending[0][0] <= newest - reorder_window:
+            ts, _, count = heapq.heappop(pending)
+            yield from apply(ts, count)
+    
+    while pending:
+        ts, _, count = heapq.heappop(pending)
+        yield from apply(ts, count)
+    for i, (name, _) in enumerate(ROLLUP_RESOLUTIONS):
+        if open_buckets[i] is not None:
+            yield _make_rollup(name, open_buckets[i], weight_kg, stride_length_cm)
+
+
+def _make_rollup(resolution, bucket, weight_kg, stride_length_cm):
+    start, steps = bucket
+    distance_km = (steps * stride_length_cm) / 100000
+    calories = calculate_calories_burned(steps, weight_kg, stride_length_cm)
+    return StepRollup(resolution, start, steps, distance_km, calories)
+
+
 def main():
     """Demonstrate stride length and calorie calculation with example data."""
     # Example data
@@ -0,0 +1,143 @@
+"""
+GIF Frame Cache Module for FitPro
+Stores decoded, transparency-keyed GIF frames on disk so later launches can
+memory-map them instead of decoding the GIF with PIL again.
+"""
+
+import mmap
+import os
+import struct
+from typing import List, Optional, Tuple
+
+from keyed_file_cache import KeyedFileCache
+
+
+# File layout (little endian):
+#   header    MAGIC, version, width, height, frame count
+#   durations one float64 per frame (seconds)
+#   frames    width * height * 4 bytes of top-down RGBA per frame
+MAGIC = b'FPGF'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<4sHHIII')  # magic, version, reserved, width, height, n_frames
+_FILE_EXT = '.frames'
+
+
+class CachedGif:
+    """Frames of one GIF, memory-mapped from a cache file"""
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            # ACCESS_COPY: pages are shared with the page cache, but the
+            # mapping is writable so it can be handed to Texture.blit_buffer
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        try:
+            magic, version, _, width, height, n_frames = _HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f'unsupported frame cache file: {path}')
+            self.size: Tuple[int, int] = (width, height)
+            self.durations: List[float] = list(
+                struct.unpack_from(f'<{n_frames}d', self._map, _HEADER.size))
+            self._frame_bytes = width * height * 4
+            self._data_offset = _HEADER.size + 8 * n_frames
+            if len(self._map) != self._data_offset + n_frames * self._frame_bytes:
+                raise ValueError(f'truncated frame cache file: {path}')
+        except Exception:
+            self._map.close()
+            raise
+        self._view = memoryview(self._map)
+
+    def __len__(self) -> int:
+        return len(self.durations)
+
+    def frame(self, index: int) -> memoryview:
+        """RGBA bytes of frame `index` (a view into the mapped file)"""
+        start = self._data_offset + index * self._frame_bytes
+        return self._view[start:start + self._frame_bytes]
+
+    def close(self):
+        """Unmap the file. Views returned by frame() must no longer be in use."""
+        if self._map is not None:
+            self._view.release()
+            self._map.close()
+            self._map = None
+
+
+class FrameCacheWriter:
+    """Writes one cache file frame by frame; the file only appears on commit()"""
+    def __init__(self, path: str, size: Tuple[int, int], n_frames: int):
+        self.path = path
+        self.size = size
+        self.n_frames = n_frames
+        self.durations: List[float] = []
+        self._tmp_path = KeyedFileCache.temp_path(path)
+        self._file = open(self._tmp_path, 'wb')
+        self._file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, size[0], size[1], n_frames))
+        self._file.write(bytes(8 * n_frames))  # durations, filled in on commit()
+
+    def add(self, rgba: bytes, duration: float):
+        """Append one frame of top-down RGBA bytes"""
+        if len(self.durations) >= self.n_frames:
+            raise ValueError('more frames than announced')
+        if len(rgba) != self.size[0] * self.size[1] * 4:
+            raise ValueError('frame size does not match the GIF size')
+        self._file.write(rgba)
+        self.durations.append(duration)
+
+    def commit(self):
+        """Finish the file and atomically move it into place"""
+        if len(self.durations) != self.n_frames:
+            self.abort()
+            raise ValueError('fewer frames than announced')
+        self._file.seek(_HEADER.size)
+        self._file.write(struct.pack(f'<{self.n_frames}d', *self.durations))
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discard the partially written file"""
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+
+class GifFrameCache(KeyedFileCache):
+    """
+    On-disk cache of processed GIF frames, keyed by source file, threshold
+    and the size limit the frames were downsampled to (0 = full size)
+    """
+    def __init__(self, cache_dir: str):
+        super().__init__(cache_dir, _FILE_EXT, FORMAT_VERSION)
+
+    def cache_path(self, source: str, threshold: int, max_size: int = 0) -> str:
+        """
+        Cache file path for `source`. The name changes whenever the GIF's
+        mtime or size, the transparency threshold, the frame size limit or
+        the file format changes.
+        """
+        return self.entry_path(source, threshold, max_size)
+
+    def load(self, source: str, threshold: int, max_size: int = 0) -> Optional[CachedGif]:
+        """Map the cached frames for `source`, or return None on a miss"""
+        try:
+            path = self.cache_path(source, threshold, max_size)
+            if not os.path.exists(path):
+                return None
+            return CachedGif(path)
+        except (OSError, ValueError) as e:
+            print(f'[WARN] Ignoring GIF frame cache for {source}: {e}')
+            return None
+
+    def writer(self, source: str, threshold: int, max_size: int, size: Tuple[int, int],
+               n_frames: int) -> Optional[FrameCacheWriter]:
+        """
+        Start a new cache file for `source`, removing stale entries for the
+        same GIF. Returns None if the cache directory is not writable.
+        """
+        try:
+            path = self.prepare_entry(source, threshold, max_size)
+            return FrameCacheWriter(path, size, n_frames)
+        except OSError as e:
+            print(f'[WARN] GIF frame cache not writable: {e}')
+            return None
@@ -0,0 +1,59 @@
+"""
+Keyed File Cache Module for FitPro
+Base for on-disk caches of data derived from a source file (decoded images,
+GIF frames). An entry's name changes with the source's mtime and size and
+with the parameters it was derived with, so stale entries are never read,
+and writing a new entry removes the older ones for the same source.
+"""
+
+import hashlib
+import os
+import threading
+
+
+class KeyedFileCache:
+    """Directory of cache files named after their source file and derivation parameters"""
+    def __init__(self, cache_dir: str, file_ext: str, version: int):
+        """
+        Args:
+            cache_dir: Directory holding the cache files (created on first write)
+            file_ext: Extension of the cache files, e.g. '.frames'
+            version: File format version; changing it invalidates every entry
+        """
+        self.cache_dir = cache_dir
+        self.file_ext = file_ext
+        self.version = version
+
+    def _path_prefix(self, source: str) -> str:
+        return hashlib.sha1(os.path.abspath(source).encode('utf-8')).hexdigest()[:16]
+
+    def entry_path(self, source: str, *params) -> str:
+        """Cache file for `source` derived with `params`"""
+        st = os.stat(source)
+        key = ':'.join(str(part) for part in (st.st_mtime_ns, st.st_size, *params, self.version))
+        key_hash = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f'{self._path_prefix(source)}-{key_hash}{self.file_ext}')
+
+    def prepare_entry(self, source: str, *params) -> str:
+        """
+        Make room for a new entry: create the directory and remove the
+        entries of older versions of `source`
+
+        Returns:
+            str: The path to write the entry to (via temp_path() and os.replace())
+
+        Raises:
+            OSError: The cache directory is not writable
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.entry_path(source, *params)
+        prefix = self._path_prefix(source) + '-'
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(prefix) and name.endswith(self.file_ext):
+                os.remove(os.path.join(self.cache_dir, name))
+        return path
+
+    @staticmethod
+    def temp_path(path: str) -> str:
+        """File to write `path` to before moving it into place, unique per thread"""
+        return f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
@@ -0,0 +1,130 @@
+"""
+Keyword Matcher Module for FitPro
+Aho-Corasick automaton that finds every intent keyword in a message in a
+single pass, whatever the number of keywords. Matches must start and end
+on word boundaries, so "hi" does not fire inside "this".
+"""
+
+import json
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+class KeywordMatcher:
+    """Multi-keyword matcher mapping keywords to (priority, value) intents"""
+    def __init__(self, entries: Iterable[Tuple[str, int, object]] = ()):
+        """
+        Build the automaton
+
+        Args:
+            entries: (keyword, priority, value) triples. Keywords are
+                matched case-insensitively; a later duplicate keyword
+                replaces the earlier one.
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # per node: keyword ids ending here, including those reached via fail links
+        self._out: List[List[int]] = [[]]
+        self._keywords: List[Tuple[str, int, object]] = []
+        ids: Dict[str, int] = {}
+        for keyword, priority, value in entries:
+            keyword = keyword.lower().strip()
+            if not keyword:
+                continue
+            if keyword in ids:
+                self._keywords[ids[keyword]] = (keyword, priority, value)
+                continue
+            ids[keyword] = len(self._keywords)
+            self._keywords.append((keyword, priority, value))
+            self._insert(keyword, ids[keyword])
+        self._build_fail_links()
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    def _insert(self, keyword: str, keyword_id: int):
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(keyword_id)
+
+    def _build_fail_links(self):
+        """Breadth-first pass setting each node's longest proper suffix state"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str, int, object]]:
+        """
+        Every whole-word keyword occurrence in `text`
+
+        Returns:
+            List of (start, end, keyword, priority, value), in order of end position
+        """
+        text = text.lower()
+        goto, fail, out, keywords = self._goto, self._fail, self._out, self._keywords
+        matches = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            end = i + 1
+            if end < len(text) and _is_word_char(text[end]):
+                continue
+            for keyword_id in out[node]:
+                keyword, priority, value = keywords[keyword_id]
+                start = end - len(keyword)
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                matches.append((start, end, keyword, priority, value))
+        return matches
+
+    def best(self, text: str) -> Optional[object]:
+        """
+        Value of the best match: highest priority, then longest keyword,
+        then earliest in the text. None if nothing matches.
+        """
+        best_key, best_value = None, None
+        for start, end, keyword, priority, value in self.find_all(text):
+            key = (priority, len(keyword), -start)
+            if best_key is None or key > best_key:
+                best_key, best_value = key, value
+        return best_value
+
+
+def load_intents(path: str) -> List[Tuple[str, int, str]]:
+    """
+    Read (keyword, priority, response) entries from a JSON intents file of
+    the form {"intents": [{"keywords": [...], "response": "...", "priority": 1}]}
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    entries = []
+    for intent in data.get('intents', []):
+        response = intent['response']
+        priority = int(intent.get('priority', 1))
+        for keyword in intent['keywords']:
+            entries.append((keyword, priority, response))
+    return entries
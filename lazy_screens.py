@@ -0,0 +1,92 @@
+"""
+Lazy Screens Module for FitPro
+ScreenManager that builds registered screens on first navigation, or ahead
+of time during idle moments, instead of all of them at startup.
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from kivy.clock import Clock
+from kivy.uix.screenmanager import Screen, ScreenManager
+
+from clock_profiler import profiled
+
+
+class LazyScreenManager(ScreenManager):
+    """
+    ScreenManager with screens registered as factories. Setting `current`
+    to a registered name builds the screen first; warm_up() builds the
+    remaining ones one per frame, after optionally running their preload
+    step (imports, no widgets) on a background thread.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # name -> (factory, preload), for screens not built yet
+        self._factories: Dict[str, Tuple[Callable[[], Screen], Optional[Callable[[], None]]]] = {}
+
+    def register(self, name: str, factory: Callable[[], Screen],
+                 preload: Optional[Callable[[], None]] = None):
+        """
+        Register a screen to be built later
+
+        Args:
+            name: Screen name used with `current`
+            factory: Builds the screen (UI thread)
+            preload: Optional work that is safe off the UI thread, such as
+                importing the screen's dependencies; run by warm_up()
+        """
+        self._factories[name] = (factory, preload)
+
+    def pending(self) -> List[str]:
+        """Registered screens that have not been built yet"""
+        return list(self._factories)
+
+    def materialize(self, name: str) -> Optional[Screen]:
+        """Build a registered screen now if it is not built yet"""
+        entry = self._factories.get(name)
+        if entry is None:
+            return self.get_screen(name) if self.has_screen(name) else None
+        screen = entry[0]()
+        del self._factories[name]
+        screen.name = name
+        self.add_widget(screen)
+        return screen
+
+    def on_current(self, instance, value):
+        if value in self._factories:
+            self.materialize(value)
+        super().on_current(instance, value)
+
+    def warm_up(self, delay: float = 0.0):
+        """Build every pending screen in the background of the UI, one per frame"""
+        Clock.schedule_once(lambda dt: self._warm_next(), delay)
+
+    def _warm_next(self):
+        if not self._factories:
+            return
+        name = next(iter(self._factories))
+        preload = self._factories[name][1]
+        if preload is None:
+            self._build_and_continue(name)
+            return
+
+        def run_preload():
+            try:
+                preload()
+            except Exception as e:
+                print(f'[WARN] Preloading screen {name} failed: {e}')
+            Clock.schedule_once(lambda dt: self._build_and_continue(name))
+        threading.Thread(target=run_preload, name=f'preload-{name}', daemon=True).start()
+
+    @profiled
+    def _build_and_continue(self, name: str):
+        if name in self._factories:
+            try:
+                self.materialize(name)
+            except Exception as e:
+                # stays registered, so navigating to it tries again
+                print(f'[WARN] Building screen {name} failed: {e}; stopping warm-up')
+                return
+        # next screen on a later frame, so one build at a time
+        Clock.schedule_once(lambda dt: self._warm_next())
@@ -0,0 +1,177 @@
+"""
+Mock Chat Server for FitPro
+Local stand-in for the chat service, speaking HttpBackend's JSON protocol,
+with configurable latency, jitter, error rate and streaming chunking, so the
+chat path can be benchmarked and load-tested offline and reproducibly.
+
+Run it and point the app at it:
+    python mock_chat_server.py --port 8765 --latency 0.8 --jitter 0.3
+    FITPRO_CHAT_BACKEND_URL=http://127.0.0.1:8765 python fitpro.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+_WORDS = ('steady', 'walking', 'builds', 'endurance', 'so', 'aim', 'for', 'a', 'little',
+          'more', 'each', 'day', 'and', 'remember', 'to', 'rest', 'stretch', 'hydrate',
+          'your', 'progress', 'adds', 'up', 'over', 'time')
+
+
+class MockChatConfig:
+    """Behaviour of the mock server"""
+    def __init__(self, latency: float = 0.5, jitter: float = 0.0, error_rate: float = 0.0,
+                 reply_words: int = 40, chunk_words: int = 4, chunk_delay: float = 0.05,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            latency: Seconds before the reply (or its first chunk) is sent
+            jitter: Up to this many seconds are added to or removed from the latency
+            error_rate: Fraction of requests answered with HTTP 503
+            reply_words: Words per reply
+            chunk_words: Words per streamed chunk
+            chunk_delay: Seconds between streamed chunks
+            seed: Random seed, for reproducible runs
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.reply_words = reply_words
+        self.chunk_words = chunk_words
+        self.chunk_delay = chunk_delay
+        self.seed = seed
+
+
+class MockChatServer:
+    """Threaded HTTP server answering /generate and /stream with canned replies"""
+    def __init__(self, config: Optional[MockChatConfig] = None, host: str = '127.0.0.1',
+                 port: int = 0):
+        """
+        Bind the server (port 0 picks a free port)
+        """
+        self.config = config or MockChatConfig()
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {'requests': 0, 'errors': 0, 'streams': 0}
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'MockChatServer':
+        """Serve on a background thread"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='mock-chat',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _plan(self, stream: bool):
+        """Decide one request's delay, failure and reply text"""
+        config = self.config
+        with self._lock:
+            self.stats['requests'] += 1
+            if stream:
+                self.stats['streams'] += 1
+            delay = max(0.0, config.latency + self._random.uniform(-config.jitter, config.jitter))
+            failed = self._random.random() < config.error_rate
+            if failed:
+                self.stats['errors'] += 1
+            words = [self._random.choice(_WORDS) for _ in range(config.reply_words)]
+        text = ' '.join(words).capitalize() + '.'
+        return delay, failed, text
+
+
+def _make_handler(server: MockChatServer):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path not in ('/generate', '/stream'):
+                self.send_error(404)
+                return
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                json.loads(self.rfile.read(length) or b'{}')['contents']
+            except (ValueError, KeyError, TypeError):
+                self.send_error(400, 'expected {"contents": [...]}')
+                return
+            stream = self.path == '/stream'
+            delay, failed, text = server._plan(stream)
+            time.sleep(delay)
+            if failed:
+                self._send_json(503, {'error': 'simulated failure'})
+            elif stream:
+                self._send_stream(text)
+            else:
+                self._send_json(200, {'text': text})
+
+        def _send_json(self, status: int, body: dict):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_stream(self, text: str):
+            # HTTP/1.0 without Content-Length: the body ends when the connection closes
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.end_headers()
+            words = text.split(' ')
+            step = max(1, server.config.chunk_words)
+            for i in range(0, len(words), step):
+                if i:
+                    time.sleep(server.config.chunk_delay)
+                chunk = ' '.join(words[i:i + step]) + (' ' if i + step < len(words) else '')
+                self.wfile.write(json.dumps({'text': chunk}).encode('utf-8') + b'\n')
+                self.wfile.flush()
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local mock of the FitPro chat backend')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.5, help='seconds before replying')
+    parser.add_argument('--jitter', type=float, default=0.0, help='+/- seconds of latency jitter')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of HTTP 503 replies')
+    parser.add_argument('--reply-words', type=int, default=40)
+    parser.add_argument('--chunk-words', type=int, default=4, help='words per streamed chunk')
+    parser.add_argument('--chunk-delay', type=float, default=0.05, help='seconds between chunks')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    config = MockChatConfig(args.latency, args.jitter, args.error_rate, args.reply_words,
+                            args.chunk_words, args.chunk_delay, args.seed)
+    server = MockChatServer(config, args.host, args.port)
+    print(f'[INFO] Mock chat server listening on {server.url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
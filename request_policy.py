@@ -0,0 +1,214 @@
+"""
+Request Policy Module for FitPro
+Rules around chat API calls: an overall deadline per request, retries with
+jittered exponential backoff for errors worth retrying, a circuit breaker
+that stops calling a failing service for a while, and single-flight
+de-duplication of identical requests that are already in flight.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from chat_backends import BackendError
+
+T = TypeVar('T')
+
+
+def is_retryable(error: BaseException) -> bool:
+    """True for failures that may succeed on a later attempt"""
+    if isinstance(error, BackendError):
+        return error.retryable
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+class RetryPolicy:
+    """Retries within an overall deadline, with full-jitter exponential backoff"""
+    def __init__(self, max_attempts: int = 3, deadline: float = 20.0, attempt_timeout: float = 10.0,
+                 base_delay: float = 0.5, max_delay: float = 4.0,
+                 rng: Optional[random.Random] = None):
+        """
+        Args:
+            max_attempts: Attempts per request, including the first
+            deadline: Seconds one request may take across all attempts
+            attempt_timeout: Timeout handed to a single attempt (capped by
+                the time left until the deadline)
+            base_delay: Backoff before the second attempt, doubled for each further one
+            max_delay: Upper bound of the backoff
+            rng: Random source for the jitter
+        """
+        self.max_attempts = max_attempts
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+
+    def backoff(self, attempt: int) -> float:
+        """Delay after failed attempt number `attempt` (1-based): uniform in [0, cap]"""
+        return self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def call(self, fn: Callable[[float], T],
+             should_retry: Callable[[BaseException], bool] = is_retryable) -> T:
+        """
+        Run fn(timeout) until it succeeds, fails with an error not worth
+        retrying, runs out of attempts or would overrun the deadline
+
+        Raises:
+            The last attempt's error, or TimeoutError once the deadline passed
+        """
+        end = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f'request deadline of {self.deadline:.0f} s exceeded')
+            try:
+                return fn(min(self.attempt_timeout, remaining))
+            except Exception as e:
+                if attempt >= self.max_attempts or not should_retry(e):
+                    raise
+                delay = self.backoff(attempt)
+                if time.monotonic() + delay >= end:
+                    raise
+                print(f'[WARN] Chat request failed ({e}); retry {attempt} in {delay:.1f} s')
+                time.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures; while open, calls
+    are refused. After `reset_timeout` seconds one trial call is let through
+    (half-open): success closes the breaker, failure opens it again. Every
+    call that was allowed must end in record_success(), record_failure() or
+    release(), or a half-open breaker never lets another call through.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go out now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            # open, or half-open with the trial call still running
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            if self.state != self.CLOSED:
+                print('[INFO] Chat service recovered; leaving offline mode')
+            self.state = self.CLOSED
+
+    def release(self):
+        """
+        End a call that produced no verdict on the service. A half-open
+        trial is undone, so the next call becomes the trial.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f'[WARN] Chat service failing; offline mode for {self.reset_timeout:.0f} s')
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class _Flight:
+    def __init__(self):
+        self.future: Optional[Future] = None
+        self.listeners: List[Callable[[str], None]] = []
+        self.text = ''
+
+
+class SingleFlight:
+    """
+    De-duplicates identical in-flight requests: while one is running, the
+    same key joins it instead of starting another. Joiners get their own
+    Future with the shared result, and streamed text, including what was
+    already streamed before they joined.
+    """
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        # reentrant: a future that is already done runs its callbacks inline
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def run(self, key: str, start: Callable[[Callable[[str], None]], Future],
+            on_chunk: Optional[Callable[[str], None]] = None) -> Future:
+        """
+        Start or join the request for `key`
+
+        Args:
+            key: Identity of the request
+            start: start(on_chunk) launches the request and returns its Future
+            on_chunk: Receives streamed text of the shared request
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                if on_chunk is not None:
+                    flight.listeners.append(on_chunk)
+                    if flight.text:
+                        on_chunk(flight.text)
+                joined = Future()
+                flight.future.add_done_callback(lambda f: _copy_outcome(f, joined))
+                return joined
+            flight = _Flight()
+            if on_chunk is not None:
+                flight.listeners.append(on_chunk)
+            self._flights[key] = flight
+
+            def dispatch(chunk: str):
+                with self._lock:
+                    flight.text += chunk
+                    listeners = list(flight.listeners)
+                for listener in listeners:
+                    listener(chunk)
+
+            # still holding the lock, so no joiner sees the flight without its future
+            flight.future = start(dispatch)
+            flight.future.add_done_callback(lambda f: self._finish(key, flight))
+            return flight.future
+
+    def _finish(self, key: str, flight: _Flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+
+def _copy_outcome(source: Future, target: Future):
+    """Give `target` the result, error or cancellation of `source`"""
+    try:
+        if source.cancelled():
+            target.cancel()
+        elif source.exception() is not None:
+            target.set_exception(source.exception())
+        else:
+            target.set_result(source.result())
+    except InvalidStateError:
+        # the joiner was cancelled meanwhile
+        pass
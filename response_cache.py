@@ -0,0 +1,217 @@
+"""
+Response Cache Module for FitPro
+Keeps chatbot answers in SQLite, keyed by a normalized form of the question,
+so repeated questions are answered without another API round-trip.
+Optionally, questions worded slightly differently (same content words,
+different filler words or order) can be matched by cosine similarity of
+character n-gram vectors.
+"""
+
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, FrozenSet, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,         -- normalized question
+    answer TEXT NOT NULL,
+    created REAL NOT NULL,        -- time.time() when stored
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+# words that do not change what a question asks; negations are not among them
+_FILLER_WORDS = frozenset((
+    'a', 'an', 'the', 'i', 'me', 'my', 'you', 'your', 'we', 'it', 'is', 'are', 'am', 'be',
+    'do', 'does', 'did', 'can', 'could', 'should', 'would', 'will', 'how', 'what', 'which',
+    'much', 'many', 'to', 'of', 'for', 'in', 'on', 'at', 'and', 'or', 'with', 'about',
+    'please', 'tell', 'some', 'any', 'there', 'that', 'this',
+))
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return _SPACES.sub(' ', _NON_WORD.sub(' ', text.lower())).strip()
+
+
+def content_words(key: str) -> FrozenSet[str]:
+    """Words of a normalized question that carry its meaning"""
+    return frozenset(word for word in key.split() if word not in _FILLER_WORDS)
+
+
+def ngram_vector(key: str, n: int = 3) -> Tuple[Dict[str, int], float]:
+    """Character n-gram counts of a normalized question and the vector's norm"""
+    padded = f' {key} '
+    grams = Counter(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+    return grams, math.sqrt(sum(c * c for c in grams.values()))
+
+
+def cosine_similarity(a: Tuple[Dict[str, int], float], b: Tuple[Dict[str, int], float]) -> float:
+    """Cosine similarity of two ngram_vector() results"""
+    (grams_a, norm_a), (grams_b, norm_b) = a, b
+    if not norm_a or not norm_b:
+        return 0.0
+    if len(grams_a) > len(grams_b):
+        grams_a, grams_b = grams_b, grams_a
+    dot = sum(count * grams_b.get(gram, 0) for gram, count in grams_a.items())
+    return dot / (norm_a * norm_b)
+
+
+class ResponseCache:
+    """On-disk question -> answer cache with size and age limits"""
+    def __init__(self, path: str, max_entries: int = 500, ttl: float = 7 * 86400,
+                 similarity_threshold: Optional[float] = None, ngram: int = 3):
+        """
+        Open (or create) the cache
+
+        Args:
+            path: SQLite database file
+            max_entries: Entries kept; the least recently used are evicted first
+            ttl: Seconds after which an answer expires
+            similarity_threshold: Minimum cosine similarity for a similar-question
+                hit, or None to match normalized questions exactly only. Similar
+                questions must also have the same content words: n-gram
+                similarity alone scores opposites such as "lose weight" and
+                "gain weight" above 0.85.
+            ngram: Character n-gram length used for similarity
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.ngram = ngram
+        self._lock = threading.Lock()
+        # used from the chatbot's worker thread, created on the UI thread
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(_SCHEMA)
+        # n-gram vectors of every cached question, for similarity lookups
+        self._vectors: Dict[str, Tuple[Dict[str, int], float]] = {}
+        self._evict()
+        self._vectors = {key: ngram_vector(key, ngram)
+                         for (key,) in self._conn.execute('SELECT key FROM responses')}
+        self._hits = 0
+        self._similar_hits = 0
+        self._misses = 0
+        self._lookup_time = 0.0
+
+    def get(self, question: str, allow_similar: bool = False) -> Optional[str]:
+        """
+        Cached answer for `question`, or None
+
+        Args:
+            question: The user's question as typed
+            allow_similar: Also accept the most similar cached question above
+                the similarity threshold, if one is set (only safe without
+                conversation context)
+        """
+        start = time.perf_counter()
+        key = normalize_question(question)
+        with self._lock:
+            answer, similar = None, False
+            try:
+                answer = self._lookup(key) if key else None
+                if answer is None and allow_similar and key and self.similarity_threshold is not None:
+                    match = self._most_similar(key)
+                    if match is not None:
+                        answer = self._lookup(match)
+                        similar = answer is not None
+            except sqlite3.Error as e:
+                print(f'[WARN] Response cache lookup failed: {e}')
+            if answer is None:
+                self._misses += 1
+            elif similar:
+                self._similar_hits += 1
+            else:
+                self._hits += 1
+            self._lookup_time += time.perf_counter() - start
+        return answer
+
+    def _lookup(self, key: str) -> Optional[str]:
+        now = time.time()
+        row = self._conn.execute('SELECT answer, created FROM responses WHERE key = ?',
+                                 (key,)).fetchone()
+        if row is None:
+            return None
+        answer, created = row
+        if now - created >= self.ttl:
+            with self._conn:
+                self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self._vectors.pop(key, None)
+            return None
+        with self._conn:
+            self._conn.execute('UPDATE responses SET last_used = ? WHERE key = ?', (now, key))
+        return answer
+
+    def _most_similar(self, key: str) -> Optional[str]:
+        vector = ngram_vector(key, self.ngram)
+        words = content_words(key)
+        best_key, best_score = None, self.similarity_threshold
+        for other, other_vector in self._vectors.items():
+            if content_words(other) != words:
+                continue
+            score = cosine_similarity(vector, other_vector)
+            if score >= best_score:
+                best_key, best_score = other, score
+        return best_key
+
+    def put(self, question: str, answer: str):
+        """Store the answer to `question`, evicting old entries if needed"""
+        key = normalize_question(question)
+        if not key or not answer:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        'INSERT OR REPLACE INTO responses (key, answer, created, last_used) '
+                        'VALUES (?, ?, ?, ?)', (key, answer, now, now))
+                self._vectors[key] = ngram_vector(key, self.ngram)
+                self._evict()
+            except sqlite3.Error as e:
+                print(f'[ERROR] Failed to write response cache: {e}')
+
+    def _evict(self):
+        """Drop expired entries, then the least recently used beyond max_entries"""
+        stale = self._conn.execute(
+            'SELECT key FROM responses WHERE created <= ? UNION '
+            'SELECT key FROM (SELECT key FROM responses ORDER BY last_used DESC '
+            'LIMIT -1 OFFSET ?)', (time.time() - self.ttl, self.max_entries)).fetchall()
+        if not stale:
+            return
+        with self._conn:
+            self._conn.executemany('DELETE FROM responses WHERE key = ?', stale)
+        for (key,) in stale:
+            self._vectors.pop(key, None)
+
+    def clear(self):
+        """Remove every cached answer"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute('DELETE FROM responses')
+            self._vectors.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Lookup counts, hit rate and mean lookup latency in milliseconds"""
+        with self._lock:
+            lookups = self._hits + self._similar_hits + self._misses
+            return {
+                'entries': len(self._vectors),
+                'lookups': lookups,
+                'hits': self._hits,
+                'similar_hits': self._similar_hits,
+                'misses': self._misses,
+                'hit_rate': (self._hits + self._similar_hits) / lookups if lookups else 0.0,
+                'mean_lookup_ms': self._lookup_time * 1000 / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        self._conn.close()
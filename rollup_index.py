@@ -0,0 +1,248 @@
+"""
+Rollup Index Module for FitPro
+In-memory prefix-sum (Fenwick tree) index over the step timeline. Adding a
+sample updates every resolution in O(log n); totals over any window, goal
+hit counts and the current streak are read in O(log n), so the dashboard
+never recomputes from raw samples.
+"""
+
+import time
+from array import array
+from calendar import monthrange
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+
+from step_history import day_to_date, local_day, local_hour
+
+
+class FenwickTree:
+    """Growable binary indexed tree of floats supporting point add and prefix sums"""
+    def __init__(self, capacity: int = 256):
+        self._values = array('d', bytes(8 * capacity))
+        self._tree = array('d', bytes(8 * (capacity + 1)))   # 1-based
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __getitem__(self, index: int) -> float:
+        return self._values[index] if 0 <= index < len(self._values) else 0.0
+
+    def _grow(self, min_size: int):
+        size = len(self._values)
+        while size < min_size:
+            size *= 2
+        self._values.extend(array('d', bytes(8 * (size - len(self._values)))))
+        self._rebuild()
+
+    def _rebuild(self):
+        """Rebuild the tree from the raw values in O(n)"""
+        n = len(self._values)
+        tree = array('d', bytes(8)) + self._values
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def add(self, index: int, delta: float):
+        """Add `delta` to the value at `index` (0-based)"""
+        if index >= len(self._values):
+            self._grow(index + 1)
+        self._values[index] += delta
+        tree = self._tree
+        n = len(tree) - 1
+        i = index + 1
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index: int) -> float:
+        """Sum of values [0, index]"""
+        tree = self._tree
+        i = min(index + 1, len(tree) - 1)
+        total = 0.0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def range_sum(self, first: int, last: int) -> float:
+        """Sum of values [first, last]"""
+        if last < first or last < 0:
+            return 0.0
+        return self.prefix(last) - (self.prefix(first - 1) if first > 0 else 0.0)
+
+    def last_below(self, index: int, full: float) -> int:
+        """
+        For a tree of 0/`full` indicator values: the largest position
+        <= `index` whose value is not `full`, or -1 if there is none.
+        Walks down the tree in O(log n).
+        """
+        if index < 0:
+            return -1
+        # positions past the end hold 0, so they are misses themselves
+        if index >= len(self._values):
+            return index
+        # misses in [0, index]; find the position of the last one
+        misses = (index + 1) - self.prefix(index) / full
+        if misses < 0.5:
+            return -1
+        tree = self._tree
+        n = len(tree) - 1
+        pos = 0
+        remaining = misses
+        step = 1 << (n.bit_length() - 1)
+        while step:
+            nxt = pos + step
+            if nxt <= n:
+                node_misses = step - tree[nxt] / full
+                if node_misses < remaining - 0.5:
+                    pos = nxt
+                    remaining -= node_misses
+            step >>= 1
+        return pos
+
+
+class RollupIndex:
+    """
+    Prefix-sum index of steps per local hour and steps, distance, calories
+    and goal hits per local day
+    """
+    def __init__(self, goal: int, origin_day: Optional[int] = None):
+        """
+        Create an empty index
+
+        Args:
+            goal: Daily step goal used for goal hits and streaks
+            origin_day: First local day number covered (defaults to the first sample's day)
+        """
+        self.goal = goal
+        self.origin_day = origin_day
+        self._hour_steps = FenwickTree(24 * 256)
+        self._day_steps = FenwickTree()
+        self._day_distance = FenwickTree()
+        self._day_calories = FenwickTree()
+        self._day_hits = FenwickTree()
+
+    def _trees(self) -> Tuple[Tuple[FenwickTree, int], ...]:
+        """Every tree with the number of slots per day"""
+        return ((self._hour_steps, 24), (self._day_steps, 1), (self._day_distance, 1),
+                (self._day_calories, 1), (self._day_hits, 1))
+
+    @classmethod
+    def from_rows(cls, goal: int, daily_rows: Iterable[Tuple[int, int, float, float]],
+                  hourly_rows: Iterable[Tuple[int, int, float, float]] = ()) -> 'RollupIndex':
+        """Build an index from (bucket, steps, distance km, kcal) rollup rows"""
+        index = cls(goal)
+        for day, steps, distance_km, calories in daily_rows:
+            index._add_day(day, steps, distance_km, calories)
+        for hour, steps, _, _ in hourly_rows:
+            index._add_hour(hour, steps)
+        return index
+
+    @classmethod
+    def from_history(cls, history, goal: int) -> 'RollupIndex':
+        """Build an index from a StepHistory's rollup tables"""
+        return cls.from_rows(goal, history.rollup_rows('daily'), history.rollup_rows('hourly'))
+
+    def _day_offset(self, day: int) -> int:
+        if self.origin_day is None:
+            self.origin_day = day
+        elif day < self.origin_day:
+            self._rebase(day)
+        return day - self.origin_day
+
+    def _rebase(self, day: int):
+        """Move the origin back to `day` (rare: samples older than the index)"""
+        shift = self.origin_day - day
+        old_trees = self._trees()
+        RollupIndex.__init__(self, self.goal, day)
+        for (old, per_day), (new, _) in zip(old_trees, self._trees()):
+            for i in range(len(old)):
+                if old[i]:
+                    new.add(i + shift * per_day, old[i])
+
+    def _add_day(self, day: int, steps: int, distance_km: float, calories: float):
+        i = self._day_offset(day)
+        before = self._day_steps[i]
+        self._day_steps.add(i, steps)
+        self._day_distance.add(i, distance_km)
+        self._day_calories.add(i, calories)
+        if before < self.goal <= before + steps:
+            self._day_hits.add(i, 1)
+
+    def _add_hour(self, hour: int, steps: int):
+        self._day_offset(hour // 24)
+        self._hour_steps.add(hour - self.origin_day * 24, steps)
+
+    def add(self, ts: float, steps: int, distance_km: float, calories: float):
+        """Add one sample to every resolution, O(log n)"""
+        self._add_day(local_day(ts), steps, distance_km, calories)
+        self._add_hour(local_hour(ts), steps)
+
+    def set_goal(self, goal: int):
+        """Change the daily goal; rebuilds the goal-hit tree in O(n)"""
+        if goal == self.goal:
+            return
+        self.goal = goal
+        self._day_hits = FenwickTree(len(self._day_steps))
+        for i in range(len(self._day_steps)):
+            if self._day_steps[i] >= goal > 0:
+                self._day_hits.add(i, 1)
+
+    def _range(self, first_day: int, last_day: int) -> Tuple[int, int]:
+        if self.origin_day is None:
+            return 0, -1
+        return max(first_day, self.origin_day) - self.origin_day, last_day - self.origin_day
+
+    def totals(self, first_day: int, last_day: int) -> Tuple[int, float, float]:
+        """(steps, distance km, kcal) over local days [first_day, last_day]"""
+        lo, hi = self._range(first_day, last_day)
+        return (int(self._day_steps.range_sum(lo, hi)),
+                self._day_distance.range_sum(lo, hi),
+                self._day_calories.range_sum(lo, hi))
+
+    def hour_steps(self, first_hour: int, last_hour: int) -> int:
+        """Steps over local hours [first_hour, last_hour]"""
+        if self.origin_day is None:
+            return 0
+        base = self.origin_day * 24
+        return int(self._hour_steps.range_sum(max(first_hour, base) - base, last_hour - base))
+
+    def goal_hits(self, first_day: int, last_day: int) -> int:
+        """Days in [first_day, last_day] on which the goal was reached"""
+        lo, hi = self._range(first_day, last_day)
+        return int(self._day_hits.range_sum(lo, hi))
+
+    def current_streak(self, today: Optional[int] = None) -> int:
+        """
+        Consecutive goal days ending today, or ending yesterday while
+        today's goal is still open
+        """
+        if self.origin_day is None:
+            return 0
+        today = local_day(time.time()) if today is None else today
+        end = today - self.origin_day
+        if end < 0:
+            return 0
+        if self._day_hits[end] < 1:
+            end -= 1
+        last_miss = self._day_hits.last_below(end, 1.0)
+        return end - last_miss
+
+    def week_totals(self, day: int) -> Tuple[int, float, float]:
+        """Totals of the Monday-to-Sunday week containing local day `day`"""
+        monday = day - day_to_date(day).weekday()
+        return self.totals(monday, monday + 6)
+
+    def month_totals(self, year: int, month: int) -> Tuple[int, float, float]:
+        """Totals of a calendar month"""
+        first = date(year, month, 1).toordinal() - date(1970, 1, 1).toordinal()
+        return self.totals(first, first + monthrange(year, month)[1] - 1)
+
+    def daily_series(self, last_day: int, days: int) -> List[int]:
+        """Steps per day for the `days` days ending at `last_day`, oldest first"""
+        if self.origin_day is None:
+            return [0] * days
+        first = last_day - days + 1 - self.origin_day
+        return [int(self._day_steps[i]) for i in range(first, first + days)]
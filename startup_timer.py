@@ -0,0 +1,44 @@
+"""
+Startup Timer Module for FitPro
+Records how long each cold-start phase takes, from the first import until the
+dashboard is interactive, and prints a breakdown once startup is done.
+Import it before anything else so module loading is measured too.
+"""
+
+import time
+from typing import List, Tuple
+
+
+class StartupTimer:
+    """Named phases measured back to back from the timer's creation"""
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._last = self._start
+        self.phases: List[Tuple[str, float]] = []
+        self.finished = False
+
+    def mark(self, phase: str):
+        """End the current phase under the name `phase`"""
+        if self.finished:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def elapsed(self) -> float:
+        """Seconds since the timer started"""
+        return time.perf_counter() - self._start
+
+    def finish(self, phase: str):
+        """Mark the last phase and print the breakdown (once)"""
+        if self.finished:
+            return
+        self.mark(phase)
+        self.finished = True
+        print(f'[INFO] Startup took {self.elapsed() * 1000:.0f} ms:')
+        for name, seconds in self.phases:
+            print(f'[INFO]   {name:<24} {seconds * 1000:7.1f} ms')
+
+
+# process-wide timer, started when this module is first imported
+STARTUP = StartupTimer()
@@ -0,0 +1,170 @@
+"""
+Step History Module for FitPro
+Persists step samples with their distance and calories in SQLite (WAL mode).
+Inserts are batched, and hourly and daily totals are kept up to date on
+every flush, so range queries read pre-aggregated rows instead of scanning
+raw samples.
+"""
+
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+# date.toordinal() of 1970-01-01, to turn local day numbers into dates
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    ts REAL NOT NULL,
+    steps INTEGER NOT NULL,
+    distance_km REAL NOT NULL,
+    calories REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_ts ON samples (ts);
+CREATE TABLE IF NOT EXISTS hourly (
+    bucket INTEGER PRIMARY KEY,   -- local hours since 1970-01-01 00:00
+    steps INTEGER NOT NULL,
+    distance_km REAL NOT NULL,
+    calories REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily (
+    bucket INTEGER PRIMARY KEY,   -- local days since 1970-01-01
+    steps INTEGER NOT NULL,
+    distance_km REAL NOT NULL,
+    calories REAL NOT NULL
+);
+"""
+
+_UPSERT = """
+INSERT INTO {table} (bucket, steps, distance_km, calories) VALUES (?, ?, ?, ?)
+ON CONFLICT (bucket) DO UPDATE SET
+    steps = steps + excluded.steps,
+    distance_km = distance_km + excluded.distance_km,
+    calories = calories + excluded.calories
+"""
+
+
+def local_hour(ts: float) -> int:
+    """Local-time hour number (hours since 1970-01-01 00:00 local) of a timestamp"""
+    return int((ts + time.localtime(ts).tm_gmtoff) // 3600)
+
+
+def local_day(ts: float) -> int:
+    """Local-time day number (days since 1970-01-01 local) of a timestamp"""
+    return int((ts + time.localtime(ts).tm_gmtoff) // 86400)
+
+
+def day_to_date(day: int) -> date:
+    """Convert a local day number back to a date"""
+    return date.fromordinal(_EPOCH_ORDINAL + day)
+
+
+def hour_to_datetime(hour: int) -> datetime:
+    """Convert a local hour number back to a naive local datetime"""
+    return datetime.combine(day_to_date(hour // 24), datetime.min.time()) + timedelta(hours=hour % 24)
+
+
+class StepHistory:
+    """Append-only step history with hourly and daily rollup tables"""
+    def __init__(self, path: str, batch_size: int = 64, flush_interval: float = 30.0):
+        """
+        Open (or create) the history database
+
+        Args:
+            path: SQLite database file
+            batch_size: Buffered samples that trigger a flush
+            flush_interval: Seconds after which buffered samples are flushed
+                on the next append, however few there are
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: List[Tuple[float, int, float, float]] = []
+        self._buffer_since = 0.0
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # WAL stays consistent with NORMAL; a crash can only lose the last commits
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    def append(self, ts: float, steps: int, distance_km: float, calories: float):
+        """Buffer one sample; it is written with the next batch"""
+        if not self._buffer:
+            self._buffer_since = time.monotonic()
+        self._buffer.append((ts, steps, distance_km, calories))
+        if (len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._buffer_since >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Write buffered samples and update the rollups in one transaction"""
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        hourly: Dict[int, List[float]] = {}
+        daily: Dict[int, List[float]] = {}
+        for ts, steps, distance_km, calories in batch:
+            for rollup, bucket in ((hourly, local_hour(ts)), (daily, local_day(ts))):
+                totals = rollup.get(bucket)
+                if totals is None:
+                    rollup[bucket] = [steps, distance_km, calories]
+                else:
+                    totals[0] += steps
+                    totals[1] += distance_km
+                    totals[2] += calories
+        try:
+            with self._conn:
+                self._conn.executemany('INSERT INTO samples VALUES (?, ?, ?, ?)', batch)
+                for table, rollup in (('hourly', hourly), ('daily', daily)):
+                    self._conn.executemany(_UPSERT.format(table=table),
+                                           [(b, *totals) for b, totals in rollup.items()])
+        except sqlite3.Error as e:
+            # keep the samples for the next attempt
+            self._buffer[:0] = batch
+            print(f'[ERROR] Failed to write step history: {e}')
+
+    def _totals(self, table: str, first: int, last: int) -> List[Tuple[int, int, float, float]]:
+        self.flush()
+        return self._conn.execute(
+            f'SELECT bucket, steps, distance_km, calories FROM {table} '
+            'WHERE bucket BETWEEN ? AND ? ORDER BY bucket', (first, last)).fetchall()
+
+    def hourly_totals(self, start_ts: float, end_ts: float) -> List[Tuple[datetime, int, float, float]]:
+        """(local hour, steps, distance km, kcal) for hours with steps in [start_ts, end_ts]"""
+        return [(hour_to_datetime(b), steps, dist, kcal) for b, steps, dist, kcal
+                in self._totals('hourly', local_hour(start_ts), local_hour(end_ts))]
+
+    def daily_totals(self, start_ts: float, end_ts: float) -> List[Tuple[date, int, float, float]]:
+        """(local date, steps, distance km, kcal) for days with steps in [start_ts, end_ts]"""
+        return [(day_to_date(b), steps, dist, kcal) for b, steps, dist, kcal
+                in self._totals('daily', local_day(start_ts), local_day(end_ts))]
+
+    def last_days(self, days: int, by_hour: bool = False, now: Optional[float] = None):
+        """Totals for the last `days` days including today, per day or per hour"""
+        now = time.time() if now is None else now
+        first_day = local_day(now) - (days - 1)
+        if by_hour:
+            return [(hour_to_datetime(b), steps, dist, kcal) for b, steps, dist, kcal
+                    in self._totals('hourly', first_day * 24, local_hour(now))]
+        return [(day_to_date(b), steps, dist, kcal) for b, steps, dist, kcal
+                in self._totals('daily', first_day, local_day(now))]
+
+    def day_steps(self, ts: Optional[float] = None) -> int:
+        """Steps recorded on the local day containing `ts` (default today)"""
+        day = local_day(time.time() if ts is None else ts)
+        rows = self._totals('daily', day, day)
+        return rows[0][1] if rows else 0
+
+    def rollup_rows(self, table: str) -> List[Tuple[int, int, float, float]]:
+        """All (bucket number, steps, distance km, kcal) rows of 'hourly' or 'daily', oldest first"""
+        if table not in ('hourly', 'daily'):
+            raise ValueError(f'unknown rollup table: {table}')
+        self.flush()
+        return self._conn.execute(
+            f'SELECT bucket, steps, distance_km, calories FROM {table} ORDER BY bucket').fetchall()
+
+    def close(self):
+        """Flush pending samples and close the database"""
+        self.flush()
+        self._conn.close()
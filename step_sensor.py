@@ -0,0 +1,342 @@
+"""
+Step Sensor Ingestion Module for FitPro
+Receives step-counter readings off the UI thread, keeps the raw timeline in a
+fixed-size ring buffer and hands the UI coalesced step deltas. Timestamps
+are wall-clock (epoch) seconds, as fitness_calc.aggregate_step_samples()
+expects.
+"""
+
+import random
+import threading
+import time
+from array import array
+from typing import Callable, List, Optional, Tuple
+
+from fitness_calc import step_delta
+
+
+class SampleRing:
+    """Fixed-size, thread-safe ring buffer of (epoch timestamp, cumulative count) samples"""
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._timestamps = array('d', bytes(8 * capacity))
+        self._counts = array('q', bytes(8 * capacity))
+        self._start = 0   # index of the oldest sample
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, count: int):
+        """Store a sample, overwriting the oldest one when full"""
+        with self._lock:
+            end = (self._start + self._size) % self.capacity
+            self._timestamps[end] = timestamp
+            self._counts[end] = count
+            if self._size < self.capacity:
+                self._size += 1
+            else:
+                self._start = (self._start + 1) % self.capacity
+
+    def latest(self) -> Optional[Tuple[float, int]]:
+        """Most recent sample, or None if empty"""
+        with self._lock:
+            if not self._size:
+                return None
+            i = (self._start + self._size - 1) % self.capacity
+            return self._timestamps[i], self._counts[i]
+
+    def samples(self, since: Optional[float] = None) -> List[Tuple[float, int]]:
+        """Samples oldest first, optionally only those newer than `since`"""
+        with self._lock:
+            result = []
+            for n in range(self._size):
+                i = (self._start + n) % self.capacity
+                if since is None or self._timestamps[i] > since:
+                    result.append((self._timestamps[i], self._counts[i]))
+            return result
+
+
+class AdaptiveCadence:
+    """
+    Picks the next polling interval from recent activity: the active
+    interval while steps are coming in, backing off exponentially towards
+    the idle interval once no steps have been seen for `idle_after` seconds,
+    and the paused interval while the app is in the background.
+    """
+    def __init__(self, active_interval: float = 1.0, idle_interval: float = 15.0,
+                 paused_interval: float = 60.0, idle_after: float = 10.0,
+                 backoff: float = 2.0):
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.paused_interval = paused_interval
+        self.idle_after = idle_after
+        self.backoff = backoff
+        self.interval = active_interval
+        self.paused = False
+        self._idle_time = 0.0
+
+    def next_interval(self, delta: int, elapsed: float) -> float:
+        """
+        Interval until the next poll
+
+        Args:
+            delta: Steps seen by the poll that just ran
+            elapsed: Seconds since the previous poll
+        """
+        if self.paused:
+            return self.paused_interval
+        if delta > 0:
+            self._idle_time = 0.0
+            self.interval = self.active_interval
+        else:
+            self._idle_time += elapsed
+            if self._idle_time >= self.idle_after:
+                self.interval = min(self.idle_interval, self.interval * self.backoff)
+        return self.interval
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        """Leave the paused state and start over at the active interval"""
+        self.paused = False
+        self._idle_time = 0.0
+        self.interval = self.active_interval
+
+
+class SimulatedWalk:
+    """
+    Stand-in for a step sensor: alternating walking and resting phases of
+    random length, so the simulation has idle periods like a real user
+    """
+    def __init__(self, steps_per_second: float = 2.0,
+                 walk_seconds: Tuple[float, float] = (20.0, 90.0),
+                 rest_seconds: Tuple[float, float] = (15.0, 60.0),
+                 rng: Optional[random.Random] = None):
+        """
+        Args:
+            steps_per_second: Walking pace
+            walk_seconds: Range of the length of a walking phase
+            rest_seconds: Range of the length of a resting phase
+            rng: Random source for the phase lengths
+        """
+        self.steps_per_second = steps_per_second
+        self.walk_seconds = walk_seconds
+        self.rest_seconds = rest_seconds
+        self._rng = rng or random.Random()
+        self.reset()
+
+    def reset(self):
+        """Start over with a new walking phase"""
+        self.walking = True
+        self._phase_left = self._rng.uniform(*self.walk_seconds)
+        self._carry = 0.0
+
+    def advance(self, elapsed: float) -> int:
+        """Steps taken over the next `elapsed` seconds"""
+        while elapsed > 0:
+            span = min(elapsed, self._phase_left)
+            if self.walking:
+                self._carry += span * self.steps_per_second
+            elapsed -= span
+            self._phase_left -= span
+            if self._phase_left <= 0:
+                self.walking = not self.walking
+                self._phase_left = self._rng.uniform(
+                    *(self.walk_seconds if self.walking else self.rest_seconds))
+        steps = int(self._carry)
+        self._carry -= steps
+        return steps
+
+
+class StepSensorIngestor:
+    """
+    Collects step-counter readings on a background thread (or through
+    batched sensor callbacks on Android) and accumulates the steps taken
+    until the UI collects them with take_delta().
+    """
+    # Android batching: deliver at most once per this many microseconds
+    MAX_REPORT_LATENCY_US = 10_000_000
+
+    def __init__(self, sensor=None, on_update: Optional[Callable[[], None]] = None,
+                 cadence: Optional[AdaptiveCadence] = None, capacity: int = 4096):
+        """
+        Initialize the ingestor
+
+        Args:
+            sensor: Plyer-style step counter exposing a cumulative `steps`
+                attribute, polled when batched delivery is unavailable
+            on_update: Called from the sensor thread whenever new steps are
+                pending (e.g. a Kivy Clock trigger)
+            cadence: Chooses the interval between reads in polling mode
+            capacity: Number of raw samples kept in the ring buffer
+        """
+        self.sensor = sensor
+        self.on_update = on_update
+        self.cadence = cadence or AdaptiveCadence()
+        self.samples = SampleRing(capacity)
+        self.batched = False
+        self._lock = threading.Lock()
+        self._last_count: Optional[int] = None
+        self._pending = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._android = None
+
+    def start(self):
+        """Start receiving readings, preferring batched Android delivery"""
+        if self._thread is not None or self._android is not None:
+            return
+        self._stop.clear()
+        self._android = _AndroidStepSource.create(self.record, self.MAX_REPORT_LATENCY_US)
+        if self._android is not None:
+            self.batched = True
+            print('[INFO] Step counter using batched sensor delivery')
+            return
+        self.batched = False
+        self._thread = threading.Thread(target=self._poll_loop, name='step-sensor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop receiving readings; pending steps can still be taken"""
+        self._stop.set()
+        self._wake.set()
+        if self._android is not None:
+            self._android.close()
+            self._android = None
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        # a new session starts from a fresh baseline
+        with self._lock:
+            self._last_count = None
+
+    def pause(self):
+        """
+        App went to the background: poll rarely. Batched delivery needs no
+        change, the sensor keeps batching in hardware.
+        """
+        self.cadence.pause()
+
+    def resume(self):
+        """App is back in the foreground: read the sensor immediately"""
+        self.cadence.resume()
+        if self._android is not None:
+            self._android.flush()
+        self._wake.set()
+
+    def _poll_loop(self):
+        last_poll = time.monotonic()
+        while not self._stop.is_set():
+            self._wake.clear()
+            delta = 0
+            try:
+                count = self.sensor.steps
+                if count is not None:
+                    delta = self.record(int(count))
+            except Exception as e:
+                print(f'[ERROR] Failed to read step sensor: {e}')
+            now = time.monotonic()
+            interval = self.cadence.next_interval(delta, now - last_poll)
+            last_poll = now
+            # the counter is cumulative, so a long wait loses no steps
+            self._wake.wait(interval)
+
+    def record(self, count: int, timestamp: Optional[float] = None) -> int:
+        """
+        Ingest one cumulative reading (any thread). The first reading after
+        start() only sets the baseline; a lower count means the counter was
+        reset and counts from zero again.
+
+        Args:
+            count: Cumulative step count
+            timestamp: Epoch seconds of the reading (default: now). Not
+                monotonic time, which stops while an Android device sleeps.
+
+        Returns:
+            int: Steps this reading added
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            if count == self._last_count:
+                return 0
+            delta = 0
+            if self._last_count is not None:
+                delta = step_delta(self._last_count, count)
+                self._pending += delta
+            self._last_count = count
+            has_steps = self._pending > 0
+        self.samples.append(timestamp, count)
+        if has_steps and self.on_update is not None:
+            self.on_update()
+        return delta
+
+    def take_delta(self) -> int:
+        """Steps recorded since the last call"""
+        with self._lock:
+            delta = self._pending
+            self._pending = 0
+            return delta
+
+
+class _AndroidStepSource:
+    """TYPE_STEP_COUNTER listener registered with a max report latency (Android only)"""
+    def __init__(self, manager, listener):
+        self._manager = manager
+        self._listener = listener
+
+    @classmethod
+    def create(cls, record: Callable[..., None], max_latency_us: int):
+        """Register a batched listener, or return None off Android / on failure"""
+        try:
+            from jnius import autoclass, PythonJavaClass, java_method
+        except ImportError:
+            return None
+        try:
+            PythonActivity = autoclass('org.kivy.android.PythonActivity')
+            Context = autoclass('android.content.Context')
+            Sensor = autoclass('android.hardware.Sensor')
+            SensorManager = autoclass('android.hardware.SensorManager')
+            SystemClock = autoclass('android.os.SystemClock')
+
+            class StepListener(PythonJavaClass):
+                __javainterfaces__ = ['android/hardware/SensorEventListener']
+                __javacontext__ = 'app'
+
+                @java_method('(Landroid/hardware/SensorEvent;)V')
+                def onSensorChanged(self, event):
+                    # event.timestamp is in the elapsedRealtimeNanos() base;
+                    # map it onto wall-clock time by its age
+                    age = (SystemClock.elapsedRealtimeNanos() - event.timestamp) / 1e9
+                    record(int(event.values[0]), time.time() - age)
+
+                @java_method('(Landroid/hardware/Sensor;I)V')
+                def onAccuracyChanged(self, sensor, accuracy):
+                    pass
+
+            manager = PythonActivity.mActivity.getSystemService(Context.SENSOR_SERVICE)
+            sensor = manager.getDefaultSensor(Sensor.TYPE_STEP_COUNTER)
+            if sensor is None:
+                return None
+            listener = StepListener()
+            if not manager.registerListener(listener, sensor,
+                                            SensorManager.SENSOR_DELAY_NORMAL, max_latency_us):
+                return None
+            return cls(manager, listener)
+        except Exception as e:
+            print(f'[INFO] Batched step sensor not available: {e}')
+            return None
+
+    def flush(self):
+        """Ask the sensor to deliver its batched readings now"""
+        try:
+            self._manager.flush(self._listener)
+        except Exception as e:
+            print(f'[WARN] Failed to flush step sensor: {e}')
+
+    def close(self):
+        self._manager.unregisterListener(self._listener)
@@ -0,0 +1,68 @@
+import pytest
+
+from kivy.base import EventLoop
+from kivy.clock import Clock
+from kivy.lang import Builder
+from kivy.metrics import dp
+
+from chat_screen import ChatBubble, ChatTranscript
+
+REPLY = ('Start with a brisk ten minute walk every morning.\n'
+         'Add a short run twice a week and stretch afterwards, holding each stretch '
+         'for about thirty seconds.\nDrink water.')
+
+
+@pytest.fixture
+def window():
+    EventLoop.ensure_window()
+    return EventLoop.window
+
+
+def render_frames(window, count=3):
+    for _ in range(count):
+        Clock.tick()
+        Builder.sync()
+        Clock.tick_draw()
+        Builder.sync()
+        window.dispatch('on_draw')
+        window.dispatch('on_flip')
+
+
+@pytest.fixture
+def transcript(window):
+    ChatBubble._textures.clear()
+    transcript = ChatTranscript(size=(dp(360), dp(560)), size_hint=(None, None))
+    window.add_widget(transcript)
+    render_frames(window)
+    yield transcript
+    window.remove_widget(transcript)
+
+
+def test_streamed_text_stays_out_of_the_texture_cache(transcript, window):
+    for i in range(6):
+        transcript.append(f'Question {i}')
+    row = transcript.append('[b]Assistant:[/b]\n[i]Thinking...[/i]')
+    render_frames(window)
+    cached = set(ChatBubble._textures)
+    text = ''
+    for ch in REPLY:
+        text += ch
+        transcript.set_text(row, f'[b]Assistant:[/b]\n{text}', streaming=True)
+        render_frames(window, 1)
+    assert set(ChatBubble._textures) >= cached
+    assert len(ChatBubble._textures) == len(cached)
+
+    transcript.set_text(row, f'[b]Assistant:[/b]\n{REPLY}')
+    render_frames(window)
+    assert any(key[0] == f'[b]Assistant:[/b]\n{REPLY}' for key in ChatBubble._textures)
+
+
+def test_streaming_row_height_matches_a_full_measure(transcript):
+    row = transcript.append('[b]Assistant:[/b]\n')
+    text = ''
+    for ch in REPLY:
+        text += ch
+        transcript.set_text(row, f'[b]Assistant:[/b]\n{text}', streaming=True)
+        assert transcript.data[row]['height'] == transcript.measure(f'[b]Assistant:[/b]\n{text}')
+    transcript.set_text(row, f'[b]Assistant:[/b]\n{REPLY}')
+    assert not transcript.data[row]['streaming']
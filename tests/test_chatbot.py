@@ -0,0 +1,110 @@
+import threading
+
+import pytest
+
+from chat_backends import BackendError, ChatBackend
+from chatbot import FitProChatbot, _RequestWorker
+from request_policy import CircuitBreaker, RetryPolicy
+
+
+class ScriptedBackend(ChatBackend):
+    """Raises or returns the scripted outcomes in order"""
+    name = 'scripted'
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def probe_address(self):
+        # never probe the internet from the tests
+        return ('127.0.0.1', 9)
+
+    def generate(self, contents, timeout=None):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def make_bot(backend, monkeypatch):
+    bot = FitProChatbot(backend=backend)
+    monkeypatch.setattr(bot.connectivity, 'is_online', lambda: True)
+    monkeypatch.setattr(bot.connectivity, 'report_failure', lambda error: None)
+    monkeypatch.setattr(bot.connectivity, 'report_success', lambda: None)
+    bot.retry_policy = RetryPolicy(max_attempts=1)
+    bot.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    return bot
+
+
+@pytest.mark.parametrize('error', [BackendError('bad request', 400), ValueError('empty reply')])
+def test_half_open_trial_failing_with_a_non_retryable_error_settles_the_breaker(error, monkeypatch):
+    backend = ScriptedBackend(ConnectionError('down'), error, 'Drink water.')
+    bot = make_bot(backend, monkeypatch)
+
+    bot.get_response('how much water?')
+    assert bot.breaker.state == CircuitBreaker.OPEN
+    # reset_timeout elapsed: this is the half-open trial
+    bot.get_response('how much water?')
+    assert bot.breaker.state == CircuitBreaker.CLOSED
+    assert bot.get_response('how much water?').message == 'Drink water.'
+    assert backend.calls == 3
+
+
+def test_half_open_trial_without_an_outcome_is_released(monkeypatch):
+    backend = ScriptedBackend(ConnectionError('down'), Interrupted(), 'Rest today.')
+    bot = make_bot(backend, monkeypatch)
+
+    bot.get_response('sore legs')
+    with pytest.raises(Interrupted):
+        bot.get_response('sore legs')
+    assert bot.breaker.state == CircuitBreaker.OPEN
+    assert bot.get_response('sore legs').message == 'Rest today.'
+    assert bot.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cache_is_only_used_on_the_first_turn(tmp_path, monkeypatch):
+    backend = ScriptedBackend('Drink water.', 'Walk it off.', 'Two litres a day.')
+    bot = FitProChatbot(cache_path=str(tmp_path / 'cache.db'), backend=backend)
+    monkeypatch.setattr(bot.connectivity, 'is_online', lambda: True)
+    monkeypatch.setattr(bot.connectivity, 'report_success', lambda: None)
+
+    assert not bot.get_response('How much water?').from_cache
+    bot.get_response('my legs are sore')
+    # mid-conversation the exact same words are sent to the backend
+    assert bot.get_response('how much water').message == 'Two litres a day.'
+    bot.clear_history()
+    response = bot.get_response('how much water')
+    assert response.from_cache and response.message == 'Drink water.'
+    assert backend.calls == 3
+    bot.response_cache.close()
+
+
+def test_worker_runs_requests_in_order_and_does_not_block_exit():
+    worker = _RequestWorker()
+    gate = threading.Event()
+    order = []
+    first = worker.submit(lambda: gate.wait(5) and order.append('first'))
+    second = worker.submit(order.append, 'second')
+    assert worker._thread.daemon
+    gate.set()
+    second.result(timeout=5)
+    assert first.done() and order == ['first', 'second']
+
+
+def test_shutdown_cancels_queued_requests():
+    worker = _RequestWorker()
+    started, gate = threading.Event(), threading.Event()
+    running = worker.submit(lambda: started.set() or gate.wait(5))
+    queued = worker.submit(lambda: 'never')
+    assert started.wait(5)
+    worker.shutdown()
+    assert queued.cancelled()
+    gate.set()
+    assert running.result(timeout=5) is True
+    worker._thread.join(timeout=5)
+    assert not worker._thread.is_alive()
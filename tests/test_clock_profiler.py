@@ -0,0 +1,24 @@
+import pytest
+
+from clock_profiler import ClockProfiler, profiling_requested
+
+
+@pytest.mark.parametrize('value', ['1', 'true', 'TRUE', ' yes ', 'on'])
+def test_profiling_requested(value):
+    assert profiling_requested({'FITPRO_PROFILE': value})
+
+
+@pytest.mark.parametrize('value', ['', '0', 'false', 'no', 'off', 'maybe'])
+def test_profiling_not_requested(value):
+    assert not profiling_requested({'FITPRO_PROFILE': value})
+    assert not profiling_requested({})
+
+
+def test_percentiles_come_from_the_histogram():
+    profiler = ClockProfiler()
+    for ms in [1.0] * 90 + [10.0] * 9 + [500.0]:
+        profiler.histogram[min(int(ms / profiler.BIN_MS), len(profiler.histogram) - 1)] += 1
+        profiler.frames += 1
+    assert profiler.percentile(50) == 1.25
+    assert profiler.percentile(95) == 10.25
+    assert profiler.percentile(100) == float('inf')
@@ -0,0 +1,82 @@
+from conversation_history import (ConversationHistory, estimate_tokens, extractive_summary,
+                                  first_sentence)
+
+
+def turn(i, length=80):
+    return (f'Message {i}. ' + 'x' * length)[:length]
+
+
+def test_estimate_tokens_rounds_up_and_adds_overhead():
+    assert estimate_tokens('') == 4
+    assert estimate_tokens('abcd') == 5
+    assert estimate_tokens('abcde') == 6
+
+
+def test_first_sentence_is_cut_to_length():
+    assert first_sentence('Walk more. Then run.') == 'Walk more.'
+    assert first_sentence('a' * 200, max_chars=10) == 'aaaaaaa...'
+
+
+def test_under_budget_nothing_is_folded():
+    history = ConversationHistory('prompt', token_budget=1000)
+    history.append('user', 'hello')
+    history.append('model', 'hi there')
+    assert history.summary == ''
+    assert [m['parts'][0] for m in history.messages] == ['prompt', 'hello', 'hi there']
+    assert history.total_tokens == sum(estimate_tokens(t) for t in ('prompt', 'hello', 'hi there'))
+
+
+def test_payload_stays_within_budget_and_keeps_recent_turns():
+    history = ConversationHistory('You are a coach.', token_budget=200, keep_recent=4,
+                                  summary_budget=60)
+    for i in range(40):
+        history.append('user' if i % 2 == 0 else 'model', turn(i))
+        assert history.total_tokens <= 200
+        assert history.total_tokens == sum(estimate_tokens(m['parts'][0])
+                                           for m in history.messages)
+    texts = [m['parts'][0] for m in history.messages[1:]]
+    assert texts[-4:] == [turn(i) for i in range(36, 40)]
+    # whole exchanges are folded: the kept turns start with the user
+    assert history.messages[1]['role'] == 'user'
+    assert history.messages[0]['parts'][0].startswith('You are a coach.')
+    assert estimate_tokens(history.summary) <= 60
+
+
+def test_folded_turns_end_up_in_the_summary():
+    folded = []
+
+    def summarizer(summary, messages):
+        folded.extend(m['parts'][0] for m in messages)
+        return extractive_summary(summary, messages)
+
+    history = ConversationHistory('prompt', token_budget=120, keep_recent=2,
+                                  summarizer=summarizer)
+    for i in range(10):
+        history.append('user' if i % 2 == 0 else 'model', turn(i, 60))
+    kept = [m['parts'][0] for m in history.messages[1:]]
+    assert folded + kept == [turn(i, 60) for i in range(10)]
+    assert 'User: Message 0.' in history.summary
+    assert 'Summary of the earlier conversation' in history.messages[0]['parts'][0]
+    assert not history.is_empty()
+
+
+def test_recent_turns_are_kept_even_over_budget():
+    history = ConversationHistory('prompt', token_budget=10, keep_recent=2)
+    history.append('user', 'x' * 400)
+    history.append('model', 'y' * 400)
+    assert len(history) == 2
+    assert history.summary == ''
+
+
+def test_pop_and_clear():
+    history = ConversationHistory('prompt', token_budget=120, keep_recent=2)
+    assert history.pop() is None
+    for i in range(10):
+        history.append('user' if i % 2 == 0 else 'model', turn(i, 60))
+    popped = history.pop()
+    assert popped['parts'][0] == turn(9, 60)
+    assert history.total_tokens == sum(estimate_tokens(m['parts'][0]) for m in history.messages)
+    history.clear()
+    assert history.is_empty()
+    assert history.messages == [{'role': 'user', 'parts': ['prompt']}]
+    assert history.total_tokens == estimate_tokens('prompt')
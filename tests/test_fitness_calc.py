@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+import fitness_calc
+from fitness_calc import (GENDER_FEMALE, GENDER_MALE, GENDER_OTHER, aggregate_step_samples,
+                          calculate_calories_burned, calculate_distance_and_calories_batch,
+                          calculate_stride_length, step_delta)
+
+
+def totals(rollups, resolution):
+    """{bucket start: steps} of one resolution"""
+    return {r.start: r.steps for r in rollups if r.resolution == resolution}
+
+
+def aggregate(samples, **kwargs):
+    return list(aggregate_step_samples(samples, 175, 70, **kwargs))
+
+
+def test_step_delta_treats_a_drop_as_a_counter_reset():
+    assert step_delta(100, 130) == 30
+    assert step_delta(100, 100) == 0
+    assert step_delta(5000, 12) == 12
+
+
+def test_counter_reset_counts_the_new_reading_from_zero():
+    samples = [(0, 100), (10, 150), (20, 30), (70, 50)]
+    rollups = aggregate(samples)
+    assert totals(rollups, 'minute') == {0: 80, 60: 20}
+    assert totals(rollups, 'day') == {0: 100}
+
+
+def test_out_of_order_samples_inside_the_window_are_reordered():
+    samples = [(0, 0), (20, 40), (10, 20), (70, 100), (65, 90)]
+    assert totals(aggregate(samples), 'minute') == totals(aggregate(sorted(samples)), 'minute')
+    assert totals(aggregate(samples), 'minute') == {0: 40, 60: 60}
+
+
+def test_samples_later_than_the_window_are_dropped_without_losing_steps():
+    samples = [(0, 0), (50, 50), (100, 100), (40, 40)]
+    rollups = aggregate(samples, reorder_window=30)
+    # (40, 40) arrives after 100 s were seen: its steps land in the next reading's bucket
+    assert totals(rollups, 'minute') == {0: 50, 60: 50}
+    assert sum(totals(rollups, 'minute').values()) == 100
+
+
+def test_shuffled_within_window_matches_sorted_input():
+    rng = random.Random(3)
+    samples, count = [], 0
+    for ts in range(0, 3 * 3600, 15):
+        count += rng.randint(0, 40)
+        samples.append((ts, count))
+    # every sample moves by less than the reorder window
+    shuffled = sorted(samples, key=lambda s: s[0] + rng.uniform(0, 25))
+    expected = aggregate(samples)
+    got = aggregate(shuffled)
+    for resolution in ('minute', 'hour', 'day'):
+        assert totals(got, resolution) == totals(expected, resolution)
+    assert sum(totals(got, 'day').values()) == count - samples[0][1]
+
+
+def test_utc_offset_moves_day_boundaries():
+    samples = [(0, 0), (3600, 100), (7200, 300)]
+    # local midnight at 01:00 UTC
+    rollups = aggregate(samples, utc_offset=-3600)
+    assert totals(rollups, 'day') == {-86400 + 3600: 0, 3600: 300}
+
+
+def test_rollup_distance_and_calories_follow_the_scalar_formulas():
+    rollups = aggregate([(0, 0), (30, 1000)])
+    day = [r for r in rollups if r.resolution == 'day'][0]
+    stride = calculate_stride_length(175, 'male')
+    assert day.distance_km == pytest.approx(1000 * stride / 100000)
+    assert day.calories == pytest.approx(calculate_calories_burned(1000, 70, stride))
+
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+def test_batch_matches_scalar(use_numpy, monkeypatch):
+    if not use_numpy:
+        monkeypatch.setattr(fitness_calc, '_np', None)
+    elif fitness_calc._numpy() is None:
+        pytest.skip('numpy not installed')
+    steps = [0, 1, 5000, 12345]
+    heights = [150.0, 175.5, 190.0, 160.0]
+    genders = [GENDER_MALE, GENDER_FEMALE, GENDER_OTHER, GENDER_FEMALE]
+    names = ['male', 'female', 'other', 'female']
+    distances, calories = calculate_distance_and_calories_batch(steps, heights, 70.0, genders)
+    for i in range(len(steps)):
+        stride = calculate_stride_length(heights[i], names[i])
+        assert distances[i] == steps[i] * stride / 100000
+        assert calories[i] == calculate_calories_burned(steps[i], 70.0, stride)
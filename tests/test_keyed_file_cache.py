@@ -0,0 +1,61 @@
+import os
+
+from asset_loader import DecodedImageCache
+from gif_cache import GifFrameCache
+from keyed_file_cache import KeyedFileCache
+
+
+def make_source(tmp_path, content=b'gif'):
+    source = tmp_path / 'source.gif'
+    source.write_bytes(content)
+    return str(source)
+
+
+def test_entry_path_changes_with_source_params_and_version(tmp_path):
+    source = make_source(tmp_path)
+    cache = KeyedFileCache(str(tmp_path / 'cache'), '.bin', 1)
+    path = cache.entry_path(source, 240, 80)
+    assert path == cache.entry_path(source, 240, 80)
+    assert path != cache.entry_path(source, 240, 100)
+    assert path != KeyedFileCache(cache.cache_dir, '.bin', 2).entry_path(source, 240, 80)
+    make_source(tmp_path, b'longer gif')
+    assert path != cache.entry_path(source, 240, 80)
+
+
+def test_prepare_entry_removes_older_entries_of_the_same_source(tmp_path):
+    source = make_source(tmp_path)
+    other = str(tmp_path / 'other.gif')
+    with open(other, 'wb') as f:
+        f.write(b'x')
+    cache = KeyedFileCache(str(tmp_path / 'cache'), '.bin', 1)
+    for path in (cache.prepare_entry(source, 1), cache.prepare_entry(other, 1)):
+        with open(path, 'wb') as f:
+            f.write(b'entry')
+    path = cache.prepare_entry(source, 2)
+    assert sorted(os.listdir(cache.cache_dir)) == [os.path.basename(cache.entry_path(other, 1))]
+    assert path == cache.entry_path(source, 2)
+
+
+def test_gif_frames_round_trip(tmp_path):
+    source = make_source(tmp_path)
+    cache = GifFrameCache(str(tmp_path / 'cache'))
+    writer = cache.writer(source, 240, 2, (2, 1), 2)
+    writer.add(bytes(range(8)), 0.1)
+    writer.add(bytes(range(8, 16)), 0.2)
+    writer.commit()
+    cached = cache.load(source, 240, 2)
+    assert cached.size == (2, 1) and cached.durations == [0.1, 0.2]
+    assert bytes(cached.frame(1)) == bytes(range(8, 16))
+    cached.close()
+    assert cache.load(source, 200, 2) is None
+
+
+def test_decoded_images_round_trip(tmp_path):
+    source = make_source(tmp_path)
+    cache = DecodedImageCache(str(tmp_path / 'cache'))
+    decoded = ((2, 2), 3, bytes(range(12)))
+    cache.store(source, (2, 2), decoded)
+    assert cache.load(source, (2, 2)) == decoded
+    assert cache.load(source, (4, 4)) is None
+    # the GIF cache shares the directory layout but not the entries
+    assert GifFrameCache(cache.cache_dir).load(source, 240, 2) is None
@@ -0,0 +1,74 @@
+import json
+import random
+import re
+
+from keyword_matcher import KeywordMatcher, load_intents
+
+
+def naive_find_all(entries, text):
+    """Whole-word occurrences of every keyword by regex, as (start, end, keyword)"""
+    latest = {}
+    for keyword, priority, value in entries:
+        latest[keyword.lower().strip()] = (priority, value)
+    found = set()
+    for keyword in latest:
+        pattern = r'(?<![\w])' + re.escape(keyword) + r'(?![\w])'
+        for match in re.finditer(f'(?=({pattern}))', text.lower()):
+            found.add((match.start(1), match.end(1), keyword))
+    return found
+
+
+def test_matches_whole_words_only():
+    matcher = KeywordMatcher([('hi', 1, 'greeting'), ('run', 1, 'running')])
+    assert matcher.find_all('this is running') == []
+    assert [m[2] for m in matcher.find_all('Hi! Time to run.')] == ['hi', 'run']
+
+
+def test_overlapping_and_nested_keywords():
+    entries = [('weight', 1, 'w'), ('lose weight', 2, 'lw'), ('weight loss', 2, 'wl'),
+               ('loss', 1, 'l')]
+    matcher = KeywordMatcher(entries)
+    found = {(start, end, keyword) for start, end, keyword, _, _ in
+             matcher.find_all('how to lose weight loss plan')}
+    assert found == {(7, 18, 'lose weight'), (12, 18, 'weight'), (12, 23, 'weight loss'),
+                     (19, 23, 'loss')}
+
+
+def test_best_prefers_priority_then_length_then_position():
+    matcher = KeywordMatcher([('sleep', 1, 'sleep'), ('water', 1, 'water'),
+                              ('protein', 1, 'protein'), ('protein shake', 1, 'shake'),
+                              ('injury', 3, 'injury')])
+    assert matcher.best('water or sleep') == 'water'
+    assert matcher.best('sleep and protein') == 'protein'
+    assert matcher.best('protein shake after sleep') == 'shake'
+    assert matcher.best('sleep, protein and an injury') == 'injury'
+    assert matcher.best('nothing here') is None
+
+
+def test_later_duplicate_keyword_replaces_the_earlier_one():
+    matcher = KeywordMatcher([('Cardio', 1, 'old'), ('cardio ', 2, 'new'), ('', 5, 'empty')])
+    assert len(matcher) == 1
+    assert matcher.best('CARDIO day') == 'new'
+
+
+def test_matches_a_regex_scan_on_random_text():
+    rng = random.Random(11)
+    alphabet = 'abc '
+    entries = [(''.join(rng.choice('abc') for _ in range(rng.randint(1, 4))), 1, i)
+               for i in range(30)]
+    matcher = KeywordMatcher(entries)
+    for _ in range(200):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        found = {(start, end, keyword) for start, end, keyword, _, _ in matcher.find_all(text)}
+        assert found == naive_find_all(entries, text)
+
+
+def test_load_intents(tmp_path):
+    path = tmp_path / 'intents.json'
+    path.write_text(json.dumps({'intents': [
+        {'keywords': ['yoga', 'stretch'], 'response': 'Stretch daily.', 'priority': 2},
+        {'keywords': ['swim'], 'response': 'Swimming is low impact.'},
+    ]}))
+    assert load_intents(str(path)) == [('yoga', 2, 'Stretch daily.'),
+                                       ('stretch', 2, 'Stretch daily.'),
+                                       ('swim', 1, 'Swimming is low impact.')]
@@ -0,0 +1,212 @@
+import random
+from concurrent.futures import Future
+
+import pytest
+
+import request_policy
+from chat_backends import BackendError
+from request_policy import CircuitBreaker, RetryPolicy, SingleFlight, is_retryable
+
+
+class FakeTime:
+    """Stands in for the time module: sleep() only advances monotonic()"""
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(request_policy, 'time', fake)
+    return fake
+
+
+def failing(clock, errors, result='ok', duration=0.0):
+    """fn(timeout) raising `errors` in turn, then returning `result`; records timeouts"""
+    timeouts = []
+
+    def fn(timeout):
+        timeouts.append(timeout)
+        clock.now += duration
+        if errors:
+            raise errors.pop(0)
+        return result
+    return fn, timeouts
+
+
+def test_is_retryable():
+    assert is_retryable(ConnectionError())
+    assert is_retryable(TimeoutError())
+    assert is_retryable(BackendError('busy', 503, retryable=True))
+    assert not is_retryable(BackendError('bad request', 400))
+    assert not is_retryable(ValueError())
+
+
+def test_backoff_is_full_jitter_below_a_capped_exponential():
+    policy = RetryPolicy(base_delay=0.5, max_delay=4.0, rng=random.Random(1))
+    reference = random.Random(1)
+    for attempt in range(1, 8):
+        cap = min(4.0, 0.5 * 2 ** (attempt - 1))
+        assert policy.backoff(attempt) == reference.uniform(0, cap)
+
+
+def test_retries_retryable_errors_then_succeeds(clock):
+    fn, timeouts = failing(clock, [ConnectionError('reset'), TimeoutError('slow')])
+    policy = RetryPolicy(max_attempts=3, rng=random.Random(5))
+    assert policy.call(fn) == 'ok'
+    assert len(timeouts) == 3
+    expected = random.Random(5)
+    assert clock.sleeps == [expected.uniform(0, 0.5), expected.uniform(0, 1.0)]
+
+
+def test_non_retryable_error_is_raised_at_once(clock):
+    fn, timeouts = failing(clock, [BackendError('bad request', 400)])
+    with pytest.raises(BackendError):
+        RetryPolicy(rng=random.Random(0)).call(fn)
+    assert len(timeouts) == 1 and clock.sleeps == []
+
+
+def test_gives_up_after_max_attempts(clock):
+    fn, timeouts = failing(clock, [ConnectionError(str(i)) for i in range(5)])
+    with pytest.raises(ConnectionError, match='2'):
+        RetryPolicy(max_attempts=3, rng=random.Random(0)).call(fn)
+    assert len(timeouts) == 3
+
+
+def test_attempt_timeout_is_capped_by_the_deadline(clock):
+    fn, timeouts = failing(clock, [ConnectionError(), ConnectionError()], duration=7.0)
+    policy = RetryPolicy(max_attempts=5, deadline=20.0, attempt_timeout=10.0, base_delay=0.0)
+    assert policy.call(fn) == 'ok'
+    assert timeouts == [10.0, 10.0, 6.0]
+
+
+def test_deadline_stops_retries(clock):
+    fn, timeouts = failing(clock, [ConnectionError()] * 5, duration=10.0)
+    policy = RetryPolicy(max_attempts=5, deadline=20.0, base_delay=0.0)
+    with pytest.raises((ConnectionError, TimeoutError)):
+        policy.call(fn)
+    assert len(timeouts) == 2
+    assert clock.now - 1000.0 <= 20.0
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    clock.now += 29.9
+    assert not breaker.allow()
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens_for_a_full_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+def test_released_trial_makes_the_next_call_the_trial(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow()
+    # release() outside a trial changes nothing
+    breaker.record_success()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_single_flight_shares_one_request_and_its_stream():
+    flight = SingleFlight()
+    started = []
+
+    def start(on_chunk):
+        future = Future()
+        started.append((future, on_chunk))
+        return future
+
+    first_chunks, second_chunks = [], []
+    first = flight.run('q', start, first_chunks.append)
+    future, emit = started[0]
+    emit('Drink ')
+    second = flight.run('q', start, second_chunks.append)
+    emit('water.')
+    assert len(started) == 1 and len(flight) == 1
+    assert first_chunks == ['Drink ', 'water.']
+    # the joiner gets what was streamed before it joined, then the rest
+    assert second_chunks == ['Drink ', 'water.']
+
+    future.set_result('Drink water.')
+    assert first.result() == second.result() == 'Drink water.'
+    assert second is not first
+    assert len(flight) == 0
+    flight.run('q', start)
+    assert len(started) == 2
+
+
+def test_single_flight_shares_errors_and_keeps_keys_apart():
+    flight = SingleFlight()
+    futures = {}
+
+    def start_for(key):
+        def start(on_chunk):
+            futures[key] = Future()
+            return futures[key]
+        return start
+
+    a = flight.run('a', start_for('a'))
+    joined = flight.run('a', start_for('a'))
+    b = flight.run('b', start_for('b'))
+    assert len(flight) == 2 and b is futures['b']
+    futures['a'].set_exception(ConnectionError('down'))
+    with pytest.raises(ConnectionError):
+        joined.result()
+    assert a.exception() is not None
+    assert len(flight) == 1
+
+
+def test_cancelled_joiner_does_not_affect_the_request():
+    flight = SingleFlight()
+    source = Future()
+    first = flight.run('q', lambda on_chunk: source)
+    joined = flight.run('q', lambda on_chunk: Future())
+    assert joined.cancel()
+    source.set_result('ok')
+    assert first.result() == 'ok'
+    assert joined.cancelled()
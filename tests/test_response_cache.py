@@ -0,0 +1,46 @@
+import pytest
+
+from response_cache import ResponseCache
+
+# opposite questions that character n-gram similarity scores close together
+OPPOSITE_PAIRS = [
+    ('How do I lose weight?', 'how do I gain weight'),
+    ('How many calories do I eat in a day?', 'how many calories do I burn in a day'),
+    ('Is running good for my knees?', 'is running bad for my knees'),
+    ('How many steps should I walk per day?', 'how many steps should I walk per week'),
+]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+    yield cache
+    cache.close()
+
+
+def test_exact_hit_ignores_case_and_punctuation(cache):
+    cache.put('How much water should I drink?', 'About two litres.')
+    assert cache.get('how much water should i drink') == 'About two litres.'
+    assert cache.get('How much water should I drink today?') is None
+
+
+def test_similar_matching_is_off_by_default(cache):
+    cache.put('What should I eat before a run?', 'Something light.')
+    assert cache.get('what should i eat before my run', allow_similar=True) is None
+
+
+@pytest.mark.parametrize('cached, asked', OPPOSITE_PAIRS)
+def test_opposite_questions_never_match(tmp_path, cached, asked):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), similarity_threshold=0.8)
+    cache.put(cached, 'answer')
+    assert cache.get(asked, allow_similar=True) is None
+    cache.close()
+
+
+def test_similar_match_needs_the_same_content_words(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), similarity_threshold=0.8)
+    cache.put('What should I eat before a run?', 'Something light.')
+    assert cache.get('what should i eat before my run', allow_similar=True) == 'Something light.'
+    assert cache.get('what should i eat before my run') is None
+    assert cache.stats()['similar_hits'] == 1
+    cache.close()
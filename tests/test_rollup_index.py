@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from rollup_index import FenwickTree, RollupIndex
+
+
+def linear_streak(hits, today):
+    """Reference: walk back from today (or yesterday while today is open)"""
+    end = today if hits.get(today) else today - 1
+    streak = 0
+    while hits.get(end - streak):
+        streak += 1
+    return streak
+
+
+def test_prefix_and_range_sums_match_a_linear_scan():
+    rng = random.Random(7)
+    tree = FenwickTree(capacity=8)
+    values = [0.0] * 300
+    for _ in range(2000):
+        i = rng.randrange(300)   # grows the tree past its initial capacity
+        delta = rng.uniform(-5, 5)
+        tree.add(i, delta)
+        values[i] += delta
+    for _ in range(200):
+        first, last = sorted(rng.randrange(300) for _ in range(2))
+        assert tree.range_sum(first, last) == pytest.approx(sum(values[first:last + 1]))
+
+
+def test_last_below_matches_a_linear_scan():
+    rng = random.Random(11)
+    tree = FenwickTree(capacity=64)
+    full = [rng.random() < 0.8 for _ in range(64)]
+    for i, is_full in enumerate(full):
+        if is_full:
+            tree.add(i, 1.0)
+    for index in range(-1, 100):
+        expected = next((i for i in range(index, -1, -1) if i >= 64 or not full[i]), -1)
+        assert tree.last_below(index, 1.0) == expected
+
+
+def test_streak_after_the_end_of_the_tree_is_broken_by_missing_days():
+    index = RollupIndex(goal=100, origin_day=0)
+    for day in range(256):
+        index._add_day(day, 150, 0.1, 5.0)
+    assert index.current_streak(255) == 256
+    # today still open: the streak up to yesterday counts
+    assert index.current_streak(256) == 256
+    # 144 days without any data
+    assert index.current_streak(400) == 0
+
+
+def test_streak_matches_a_linear_scan():
+    rng = random.Random(3)
+    goal = 1000
+    index = RollupIndex(goal=goal, origin_day=0)
+    hits = {}
+    for day in range(600):
+        if rng.random() < 0.9:
+            steps = rng.choice((goal, goal + 500, goal // 2))
+            index._add_day(day, steps, 0.0, 0.0)
+            hits[day] = steps >= goal
+    for today in range(0, 700, 7):
+        assert index.current_streak(today) == linear_streak(hits, today)
+
+
+def test_goal_hits_follow_goal_changes():
+    index = RollupIndex(goal=100, origin_day=10)
+    for day, steps in zip(range(10, 15), (50, 100, 150, 99, 200)):
+        index._add_day(day, steps, 0.0, 0.0)
+    assert index.goal_hits(10, 14) == 3
+    index.set_goal(60)
+    assert index.goal_hits(10, 14) == 4
+    assert index.totals(11, 12)[0] == 250
+
+
+def test_samples_older_than_the_origin_rebase_the_index():
+    index = RollupIndex(goal=100, origin_day=50)
+    index._add_day(50, 120, 1.0, 10.0)
+    index._add_day(40, 80, 0.5, 5.0)
+    assert index.origin_day == 40
+    assert index.totals(40, 50) == (200, pytest.approx(1.5), pytest.approx(15.0))
+    assert index.daily_series(50, 11)[0] == 80
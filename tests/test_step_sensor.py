@@ -0,0 +1,83 @@
+import random
+import time
+
+from fitness_calc import aggregate_step_samples
+from step_sensor import AdaptiveCadence, SampleRing, SimulatedWalk, StepSensorIngestor
+
+
+def test_walk_alternates_walking_and_resting():
+    walk = SimulatedWalk(2.0, walk_seconds=(10, 10), rest_seconds=(5, 5), rng=random.Random(0))
+    steps = [walk.advance(1.0) for _ in range(30)]
+    assert steps == [2] * 10 + [0] * 5 + [2] * 10 + [0] * 5
+
+
+def test_walk_steps_do_not_depend_on_the_tick_length():
+    fine = SimulatedWalk(1.7, rng=random.Random(4))
+    coarse = SimulatedWalk(1.7, rng=random.Random(4))
+    fine_total = sum(fine.advance(0.25) for _ in range(4 * 600))
+    coarse_total = sum(coarse.advance(37.5) for _ in range(16))
+    assert abs(fine_total - coarse_total) <= 1
+    assert 0 < fine_total < 1.7 * 600
+
+
+def test_walk_reset_starts_a_new_walking_phase():
+    walk = SimulatedWalk(2.0, walk_seconds=(10, 10), rest_seconds=(5, 5), rng=random.Random(0))
+    walk.advance(12.0)
+    assert not walk.walking
+    walk.reset()
+    assert walk.walking and walk.advance(1.0) == 2
+
+
+def test_cadence_backs_off_while_the_simulated_walker_rests():
+    walk = SimulatedWalk(2.0, walk_seconds=(30, 30), rest_seconds=(60, 60), rng=random.Random(0))
+    cadence = AdaptiveCadence(active_interval=0.5, idle_interval=15.0, idle_after=10.0)
+    interval, intervals = cadence.interval, []
+    for _ in range(400):
+        delta = walk.advance(interval)
+        interval = cadence.next_interval(delta, interval)
+        intervals.append(interval)
+    backed_off = intervals.index(15.0)
+    assert intervals[:backed_off].count(0.5) >= 60
+    # back at the active interval once walking starts again
+    assert 0.5 in intervals[backed_off:]
+
+
+def test_cadence_paused_interval_and_resume():
+    cadence = AdaptiveCadence(active_interval=1.0, paused_interval=60.0)
+    cadence.pause()
+    assert cadence.next_interval(5, 1.0) == 60.0
+    cadence.resume()
+    assert cadence.next_interval(0, 1.0) == 1.0
+
+
+def test_sample_ring_keeps_the_newest_samples():
+    ring = SampleRing(capacity=3)
+    for i in range(5):
+        ring.append(float(i), i * 10)
+    assert len(ring) == 3
+    assert ring.samples() == [(2.0, 20), (3.0, 30), (4.0, 40)]
+    assert ring.samples(since=3.0) == [(4.0, 40)]
+    assert ring.latest() == (4.0, 40)
+
+
+def test_ingested_timeline_rolls_up_into_local_buckets():
+    ingestor = StepSensorIngestor()
+    day = 20000 * 86400
+    readings = [(day + 30, 500), (day + 90, 560), (day + 3590, 700), (day + 3700, 730),
+                (day + 86400 + 10, 740)]
+    for timestamp, count in readings:
+        ingestor.record(count, timestamp)
+    rollups = list(aggregate_step_samples(ingestor.samples.samples(), 175, 70))
+    days = {r.start: r.steps for r in rollups if r.resolution == 'day'}
+    hours = {r.start: r.steps for r in rollups if r.resolution == 'hour'}
+    assert days == {day: 230, day + 86400: 10}
+    assert hours == {day: 200, day + 3600: 30, day + 86400: 10}
+    assert ingestor.take_delta() == 240
+
+
+def test_readings_default_to_wall_clock_time():
+    ingestor = StepSensorIngestor()
+    before = time.time()
+    ingestor.record(10)
+    timestamp, count = ingestor.samples.latest()
+    assert before <= timestamp <= time.time() and count == 10
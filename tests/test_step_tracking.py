@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+import fitpro
+from fitpro import FitProInterface
+from step_history import StepHistory
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = StepHistory(str(tmp_path / 'history.db'))
+    yield history
+    history.close()
+
+
+@pytest.fixture
+def interface():
+    interface = FitProInterface()
+    yield interface
+    interface.step_stop()
+
+
+def test_tracking_continues_after_the_goal_is_reached(interface, history):
+    history.append(time.time(), 10500, 7.0, 250.0)
+    interface.attach_history(history)
+    reached = []
+    interface.bind(on_goal_reached=lambda *args: reached.append(interface.steps))
+    interface.step_start()
+    interface._sim_last_tick -= 10
+    interface._step_tick(0)
+    interface.step_add(30)
+    assert interface.running
+    assert history.day_steps() == interface.steps > 10530
+    # met before the launch: not announced again
+    assert reached == []
+
+
+def test_goal_reached_is_dispatched_once(interface):
+    interface.goal = 100
+    reached = []
+    interface.bind(on_goal_reached=lambda *args: reached.append(interface.steps))
+    interface.step_add(60)
+    interface.step_add(60)
+    interface.step_add(60)
+    assert reached == [120]
+    interface.goal = 500
+    interface.step_add(400)
+    assert reached == [120, 580]
+
+
+def test_steps_start_over_on_a_new_local_day(interface, history, monkeypatch):
+    now = time.time()
+    history.append(now, 4000, 3.0, 100.0)
+    interface.attach_history(history)
+    tomorrow = now + 86400
+    monkeypatch.setattr(fitpro.time, 'time', lambda: tomorrow)
+    # no steps at midnight: the timer moves the count to the new day
+    interface._check_day()
+    assert interface.steps == 0
+    interface.step_add(25)
+    assert interface.steps == 25
+    assert history.day_steps(tomorrow) == 25
+    assert history.day_steps(now) == 4000
+
+
+def test_first_steps_after_midnight_count_for_the_new_day(interface, history, monkeypatch):
+    now = time.time()
+    history.append(now, 4000, 3.0, 100.0)
+    interface.attach_history(history)
+    tomorrow = now + 86400
+    monkeypatch.setattr(fitpro.time, 'time', lambda: tomorrow)
+    interface.step_add(40)
+    assert interface.steps == 40
+    assert history.day_steps(tomorrow) == 40
+
+
+def test_reset_keeps_recorded_steps(interface, history):
+    history.append(time.time(), 300, 0.2, 10.0)
+    interface.attach_history(history)
+    interface.step_reset()
+    assert interface.steps == 300 == history.day_steps()